@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai.services import AIService
+from finance.models import MonthlySummary
+from finance.services.accounting import AccountingService
+
+
+class Command(BaseCommand):
+    help = 'Generate AI monthly reports for every user with data for the month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month key YYYY-MM (default: previous month)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per batch')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent AI requests per batch')
+
+    def handle(self, *args, **options):
+        month_key = options['month'] or (date.today().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        batch_size = options['batch_size']
+        if batch_size < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size and --workers must be positive')
+
+        summaries = (
+            MonthlySummary.objects.filter(month_key=month_key)
+            .select_related('user__profile')
+            .order_by('pk')
+        )
+
+        ai_service = AIService()
+        generated = 0
+        last_pk = 0
+        while True:
+            batch = list(summaries.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            items = [
+                (
+                    summary.user,
+                    month_key,
+                    summary,
+                    AccountingService.top_expense_categories(user=summary.user, month_key=month_key, limit=5),
+                )
+                for summary in batch
+            ]
+            generated += len(ai_service.generate_monthly_reports_bulk(items, max_workers=options['workers']))
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {generated} monthly report(s) for {month_key}'))
@@ -1,14 +1,152 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Generator, Iterator, List, Optional, Tuple
 
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from ai.models import AIRecommendationLog
 
 
+def _build_session() -> requests.Session:
+    """Shared HTTP session so keep-alive reuses the TCP/TLS connection to DeepSeek."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        # Status retries only; timeouts and connection errors are retried in
+        # AIService._chat so each attempt gets its own connect/read budget.
+        max_retries=Retry(
+            total=2,
+            connect=0,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Content-Type': 'application/json'})
+    return session
+
+
+_SESSION = _build_session()
+
+# Recommendation logs are audit records nobody reads during the request, so they
+# are written by a single background worker once the surrounding transaction commits.
+_LOG_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-log')
+
+logger = logging.getLogger(__name__)
+
+
+def _write_logs(logs: List[AIRecommendationLog]) -> None:
+    try:
+        AIRecommendationLog.objects.bulk_create(logs)
+    except Exception:
+        logger.exception("Failed to save %d AI recommendation log(s)", len(logs))
+    finally:
+        connections.close_all()
+
+
+def _save_logs(logs: List[AIRecommendationLog]) -> None:
+    if not getattr(settings, 'AI_LOG_IN_BACKGROUND', True):
+        AIRecommendationLog.objects.bulk_create(logs)
+        return
+    transaction.on_commit(lambda: _LOG_EXECUTOR.submit(_write_logs, logs))
+
+
+class _CircuitBreaker:
+    """Stops calling DeepSeek for `reset_timeout` seconds after `fail_max` consecutive outages."""
+
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let a probe through; one more failure re-opens the circuit.
+            self._opened_at = None
+            self._failures = self.fail_max - 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+    reset = record_success
+
+
+def _is_outage(exc: Exception) -> bool:
+    """Network errors and 5xx trip the breaker; 4xx and malformed bodies do not."""
+    if not isinstance(exc, requests.RequestException):
+        return False
+    response = getattr(exc, 'response', None)
+    return response is None or response.status_code >= 500
+
+
+_BREAKER = _CircuitBreaker(
+    fail_max=int(getattr(settings, 'DEEPSEEK_BREAKER_FAIL_MAX', 5)),
+    reset_timeout=float(getattr(settings, 'DEEPSEEK_BREAKER_RESET_SECONDS', 30)),
+)
+
+_UNAVAILABLE_MESSAGE = "AI сервис временно недоступен, попробуйте позже."
+
+_NOT_CONFIGURED_MESSAGE = (
+    "AI сервис не настроен. Укажите DEEPSEEK_API_URL (и при необходимости DEEPSEEK_API_KEY) в .env.\n\n"
+    "Подсказка: сервис должен быть OpenAI-compatible (POST /v1/chat/completions)."
+)
+
+
+# Only the system prompts are constant. User prompts stay f-strings: they are
+# compiled with the module, so a template engine would add work, not remove it.
+_SYSTEM_MONTHLY_REPORT = (
+    "Ты — AI бухгалтер для личных финансов. "
+    "Твоя задача — объяснять данные простым языком для начинающих пользователей. "
+    "Запрещено придумывать цифры: используй только переданные факты и числа. "
+    "Если данных не хватает — так и скажи. "
+    "Ответ — короткий, структурированный: 1) Итог, 2) Что повлияло, 3) 3 конкретных совета."
+)
+
+_SYSTEM_GOAL_ADVICE = (
+    "Ты — AI бухгалтер/коуч по финансовым целям. "
+    "Запрещено придумывать цифры: используй только переданные факты. "
+    "Дай конкретные советы: что делать в следующем месяце. "
+    "Стиль: доброжелательно и очень понятно."
+)
+
+_SYSTEM_FORECAST_EXPLANATION = (
+    "Ты — AI бухгалтер. Объясни прогноз прибыли простыми словами. "
+    "Запрещено придумывать цифры — используй только переданные значения. "
+    "Структура: 1) Что ожидаем, 2) Почему, 3) Что сделать."
+)
+
+
 class AIServiceError(Exception):
     pass
 
@@ -17,6 +155,9 @@ class AIServiceError(Exception):
 class AIResponse:
     content: str
     raw: Optional[Dict[str, Any]] = None
+    # Canned "not configured"/"unavailable" text shown instead of a model answer;
+    # callers show it to the user but never log it as a recommendation.
+    placeholder: bool = False
 
 
 class AIService:
@@ -26,24 +167,25 @@ class AIService:
         self.api_url = getattr(settings, 'DEEPSEEK_API_URL', None)
         self.api_key = getattr(settings, 'DEEPSEEK_API_KEY', None)
         self.model = getattr(settings, 'DEEPSEEK_MODEL', 'deepseek-chat')
-        self.timeout = int(getattr(settings, 'DEEPSEEK_TIMEOUT_SECONDS', 30))
+        self.timeout = (
+            float(getattr(settings, 'DEEPSEEK_CONNECT_TIMEOUT', 5)),
+            float(getattr(settings, 'DEEPSEEK_READ_TIMEOUT', 15)),
+        )
+        self.max_retries = int(getattr(settings, 'DEEPSEEK_MAX_RETRIES', 2))
+        self.cache_seconds = int(getattr(settings, 'DEEPSEEK_CACHE_SECONDS', 60 * 60 * 24))
+        self.session = _SESSION
 
-    def _chat(self, *, system_prompt: str, user_prompt: str) -> AIResponse:
-        if not self.api_url:
-            return AIResponse(
-                content=(
-                    "AI сервис не настроен. Укажите DEEPSEEK_API_URL (и при необходимости DEEPSEEK_API_KEY) в .env.\n\n"
-                    "Подсказка: сервис должен быть OpenAI-compatible (POST /v1/chat/completions)."
-                ),
-                raw=None,
-            )
+    def _cache_key(self, system_prompt: str, user_prompt: str) -> str:
+        digest = hashlib.sha256(f"{self.model}|{system_prompt}|{user_prompt}".encode('utf-8')).hexdigest()
+        return f"ai:chat:{digest}"
 
-        headers: Dict[str, str] = {
-            'Content-Type': 'application/json',
-        }
+    def _headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
         if self.api_key:
             headers['Authorization'] = f'Bearer {self.api_key}'
+        return headers
 
+    def _payload(self, system_prompt: str, user_prompt: str, *, stream: bool = False) -> Dict[str, Any]:
         payload = {
             'model': self.model,
             'messages': [
@@ -53,26 +195,152 @@ class AIService:
             'temperature': 0.2,
             'max_tokens': 1200,
         }
+        if stream:
+            payload['stream'] = True
+        return payload
+
+    def _post(
+        self,
+        payload: Dict[str, Any],
+        *,
+        timeout: Tuple[float, float],
+        stream: bool = False,
+    ) -> requests.Response:
+        # A straggling request is cheaper to retry than to wait out.
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self.session.post(
+                    self.api_url, json=payload, headers=self._headers(), timeout=timeout, stream=stream,
+                )
+                break
+            except (requests.Timeout, requests.ConnectionError):
+                if attempt == self.max_retries:
+                    raise
+        resp.raise_for_status()
+        return resp
+
+    def _chat(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        force_refresh: bool = False,
+        request_timeout: Optional[Tuple[float, float]] = None,
+    ) -> AIResponse:
+        if not self.api_url:
+            return AIResponse(content=_NOT_CONFIGURED_MESSAGE, raw=None, placeholder=True)
+
+        # Prompts embed every number they talk about, so identical prompts mean
+        # identical inputs and the previous answer can be reused.
+        key = self._cache_key(system_prompt, user_prompt)
+        if not force_refresh and self.cache_seconds > 0:
+            cached = cache.get(key)
+            if cached is not None:
+                return AIResponse(content=cached, raw=None)
+
+        if not _BREAKER.allow():
+            return AIResponse(content=_UNAVAILABLE_MESSAGE, raw=None, placeholder=True)
 
+        payload = self._payload(system_prompt, user_prompt)
         try:
-            resp = requests.post(self.api_url, json=payload, headers=headers, timeout=self.timeout)
-            resp.raise_for_status()
+            resp = self._post(payload, timeout=request_timeout or self.timeout)
             data = resp.json()
             content = data['choices'][0]['message']['content']
-            return AIResponse(content=content, raw=data)
         except Exception as e:
+            if _is_outage(e):
+                _BREAKER.record_failure()
             raise AIServiceError(str(e)) from e
 
-    def generate_monthly_report(self, *, user, month_key: str, summary, top_categories: List[Dict[str, Any]]) -> str:
-        currency = getattr(getattr(user, 'profile', None), 'currency', 'KGS')
+        _BREAKER.record_success()
+        if self.cache_seconds > 0:
+            cache.set(key, content, self.cache_seconds)
+        return AIResponse(content=content, raw=data)
+
+    def _chat_stream(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        force_refresh: bool = False,
+    ) -> Generator[str, None, Optional[str]]:
+        """Yield completion text deltas as the OpenAI-compatible SSE stream delivers them.
+
+        The generator returns the full text, or None when it yielded a placeholder
+        (not configured / breaker open) instead of a model answer.
+        """
+        if not self.api_url:
+            yield _NOT_CONFIGURED_MESSAGE
+            return None
+
+        key = self._cache_key(system_prompt, user_prompt)
+        if not force_refresh and self.cache_seconds > 0:
+            cached = cache.get(key)
+            if cached is not None:
+                yield cached
+                return cached
+
+        if not _BREAKER.allow():
+            yield _UNAVAILABLE_MESSAGE
+            return None
+
+        payload = self._payload(system_prompt, user_prompt, stream=True)
+        parts: List[str] = []
+        try:
+            with self._post(payload, timeout=self.timeout, stream=True) as resp:
+                # SSE is UTF-8 by spec; without a charset requests would assume ISO-8859-1
+                resp.encoding = 'utf-8'
+                for line in resp.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+        except Exception as e:
+            if _is_outage(e):
+                _BREAKER.record_failure()
+            raise AIServiceError(str(e)) from e
 
-        system_prompt = (
-            "Ты — AI бухгалтер для личных финансов. "
-            "Твоя задача — объяснять данные простым языком для начинающих пользователей. "
-            "Запрещено придумывать цифры: используй только переданные факты и числа. "
-            "Если данных не хватает — так и скажи. "
-            "Ответ — короткий, структурированный: 1) Итог, 2) Что повлияло, 3) 3 конкретных совета." 
+        _BREAKER.record_success()
+        content = ''.join(parts)
+        if self.cache_seconds > 0:
+            cache.set(key, content, self.cache_seconds)
+        return content
+
+    def _stream_and_log(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        make_log: Callable[[str], AIRecommendationLog],
+        *,
+        force_refresh: bool = False,
+    ) -> Iterator[str]:
+        content = yield from self._chat_stream(
+            system_prompt=system_prompt, user_prompt=user_prompt, force_refresh=force_refresh,
         )
+        if content is not None:
+            _save_logs([make_log(content)])
+
+    def _chat_many(self, prompts: List[Tuple[str, str]], *, force_refresh: bool = False) -> List[AIResponse]:
+        """Run independent (system_prompt, user_prompt) pairs concurrently.
+
+        LLM calls are I/O-bound, so threads sharing the pooled session overlap the
+        network waits. Results keep the order of `prompts`.
+        """
+        if len(prompts) <= 1:
+            return [self._chat(system_prompt=s, user_prompt=u, force_refresh=force_refresh) for s, u in prompts]
+
+        with ThreadPoolExecutor(max_workers=len(prompts)) as pool:
+            futures = [pool.submit(self._chat, system_prompt=s, user_prompt=u, force_refresh=force_refresh) for s, u in prompts]
+            return [f.result() for f in futures]
+
+    def _monthly_report_prompts(self, *, user, month_key: str, summary, top_categories: List[Dict[str, Any]]) -> Tuple[str, str]:
+        currency = getattr(getattr(user, 'profile', None), 'currency', 'KGS')
+
+        system_prompt = _SYSTEM_MONTHLY_REPORT
 
         cats = "\n".join([f"- {c['category']}: {c['total']} {currency}" for c in top_categories]) or "- (нет данных)"
 
@@ -83,26 +351,97 @@ class AIService:
             f"Прибыль: {summary.profit} {currency}\n\n"
             f"Топ категорий расходов:\n{cats}\n"
         )
-
-        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt)
-
-        AIRecommendationLog.objects.create(
-            user=user,
-            month_key=month_key,
-            type='monthly_report',
-            content=result.content,
+        return system_prompt, user_prompt
+
+    def generate_monthly_report(
+        self,
+        *,
+        user,
+        month_key: str,
+        summary,
+        top_categories: List[Dict[str, Any]],
+        force_refresh: bool = False,
+    ) -> str:
+        system_prompt, user_prompt = self._monthly_report_prompts(
+            user=user, month_key=month_key, summary=summary, top_categories=top_categories,
         )
+        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt, force_refresh=force_refresh)
+
+        if not result.placeholder:
+            _save_logs([AIRecommendationLog(
+                user=user,
+                month_key=month_key,
+                type='monthly_report',
+                content=result.content,
+            )])
         return result.content
 
-    def generate_goal_progress_advice(self, *, user, goal, history: List[Any], forecast: Optional[Dict[str, Any]]) -> str:
+    def generate_monthly_report_stream(
+        self,
+        *,
+        user,
+        month_key: str,
+        summary,
+        top_categories: List[Dict[str, Any]],
+        force_refresh: bool = False,
+    ) -> Iterator[str]:
+        system_prompt, user_prompt = self._monthly_report_prompts(
+            user=user, month_key=month_key, summary=summary, top_categories=top_categories,
+        )
+        return self._stream_and_log(
+            system_prompt,
+            user_prompt,
+            lambda content: AIRecommendationLog(user=user, month_key=month_key, type='monthly_report', content=content),
+            force_refresh=force_refresh,
+        )
+
+    def generate_monthly_reports_bulk(
+        self,
+        items: List[Tuple[Any, str, Any, List[Dict[str, Any]]]],
+        *,
+        max_workers: int = 8,
+    ) -> Dict[int, str]:
+        """Monthly reports for many users at once, e.g. from a nightly job.
+
+        `items` are (user, month_key, summary, top_categories) tuples. Prompts are
+        sent with at most `max_workers` requests in flight; a failed report is
+        logged and skipped so one bad response does not sink the batch. Once the
+        circuit breaker opens, the remaining users are skipped the same way rather
+        than getting the "unavailable" placeholder saved as their report.
+        Returns {user_id: report}.
+        """
+        if not items:
+            return {}
+
+        prompts = [
+            self._monthly_report_prompts(user=user, month_key=month_key, summary=summary, top_categories=top_categories)
+            for user, month_key, summary, top_categories in items
+        ]
+
+        reports: Dict[int, str] = {}
+        logs: List[AIRecommendationLog] = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+            futures = [pool.submit(self._chat, system_prompt=s, user_prompt=u) for s, u in prompts]
+            for (user, month_key, _, _), future in zip(items, futures):
+                try:
+                    result = future.result()
+                except AIServiceError as e:
+                    logger.warning("Monthly report for user %s (%s) failed: %s", user.pk, month_key, e)
+                    continue
+                if result.placeholder:
+                    # Service not configured or circuit open: no report was generated
+                    logger.warning("Monthly report for user %s (%s) skipped: %s", user.pk, month_key, result.content)
+                    continue
+                reports[user.pk] = result.content
+                logs.append(AIRecommendationLog(user=user, month_key=month_key, type='monthly_report', content=result.content))
+
+        AIRecommendationLog.objects.bulk_create(logs)
+        return reports
+
+    def _goal_advice_prompts(self, *, user, goal, history: List[Any], forecast: Optional[Dict[str, Any]]) -> Tuple[str, str]:
         currency = getattr(getattr(user, 'profile', None), 'currency', 'KGS')
 
-        system_prompt = (
-            "Ты — AI бухгалтер/коуч по финансовым целям. "
-            "Запрещено придумывать цифры: используй только переданные факты. "
-            "Дай конкретные советы: что делать в следующем месяце. "
-            "Стиль: доброжелательно и очень понятно." 
-        )
+        system_prompt = _SYSTEM_GOAL_ADVICE
 
         history_lines = "\n".join([f"- {m['month_key']}: прибыль {m['profit']} {currency}" for m in history]) or "- (нет данных)"
 
@@ -125,25 +464,54 @@ class AIService:
             f"Прогноз: {forecast_text}\n\n"
             "Сделай вывод: успеваю ли я к дедлайну? Что мне улучшить? Дай 3 конкретных шага." 
         )
-
-        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt)
-
-        AIRecommendationLog.objects.create(
-            user=user,
-            goal=goal,
-            type='goal_advice',
-            content=result.content,
+        return system_prompt, user_prompt
+
+    def generate_goal_progress_advice(
+        self,
+        *,
+        user,
+        goal,
+        history: List[Any],
+        forecast: Optional[Dict[str, Any]],
+        force_refresh: bool = False,
+    ) -> str:
+        system_prompt, user_prompt = self._goal_advice_prompts(
+            user=user, goal=goal, history=history, forecast=forecast,
         )
+        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt, force_refresh=force_refresh)
+
+        if not result.placeholder:
+            _save_logs([AIRecommendationLog(
+                user=user,
+                goal=goal,
+                type='goal_advice',
+                content=result.content,
+            )])
         return result.content
 
-    def generate_forecast_explanation(self, *, user, forecast: Dict[str, Any], history: List[Any]) -> str:
+    def generate_goal_progress_advice_stream(
+        self,
+        *,
+        user,
+        goal,
+        history: List[Any],
+        forecast: Optional[Dict[str, Any]],
+        force_refresh: bool = False,
+    ) -> Iterator[str]:
+        system_prompt, user_prompt = self._goal_advice_prompts(
+            user=user, goal=goal, history=history, forecast=forecast,
+        )
+        return self._stream_and_log(
+            system_prompt,
+            user_prompt,
+            lambda content: AIRecommendationLog(user=user, goal=goal, type='goal_advice', content=content),
+            force_refresh=force_refresh,
+        )
+
+    def _forecast_explanation_prompts(self, *, user, forecast: Dict[str, Any], history: List[Any]) -> Tuple[str, str]:
         currency = getattr(getattr(user, 'profile', None), 'currency', 'KGS')
 
-        system_prompt = (
-            "Ты — AI бухгалтер. Объясни прогноз прибыли простыми словами. "
-            "Запрещено придумывать цифры — используй только переданные значения. "
-            "Структура: 1) Что ожидаем, 2) Почему, 3) Что сделать." 
-        )
+        system_prompt = _SYSTEM_FORECAST_EXPLANATION
 
         history_lines = "\n".join([f"- {s.month_key}: прибыль {s.profit} {currency}" for s in history]) or "- (нет данных)"
 
@@ -153,13 +521,78 @@ class AIService:
             f"Диапазон: {forecast.get('lower')}..{forecast.get('upper')} {currency}\n"
             f"Алгоритм: {forecast.get('algorithm')}\n"
         )
-
-        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt)
-
-        AIRecommendationLog.objects.create(
-            user=user,
-            month_key='',
-            type='forecast_explanation',
-            content=result.content,
+        return system_prompt, user_prompt
+
+    def generate_forecast_explanation(
+        self,
+        *,
+        user,
+        forecast: Dict[str, Any],
+        history: List[Any],
+        force_refresh: bool = False,
+    ) -> str:
+        system_prompt, user_prompt = self._forecast_explanation_prompts(
+            user=user, forecast=forecast, history=history,
         )
+        result = self._chat(system_prompt=system_prompt, user_prompt=user_prompt, force_refresh=force_refresh)
+
+        if not result.placeholder:
+            _save_logs([AIRecommendationLog(
+                user=user,
+                month_key='',
+                type='forecast_explanation',
+                content=result.content,
+            )])
         return result.content
+
+    def generate_forecast_explanation_stream(
+        self,
+        *,
+        user,
+        forecast: Dict[str, Any],
+        history: List[Any],
+        force_refresh: bool = False,
+    ) -> Iterator[str]:
+        system_prompt, user_prompt = self._forecast_explanation_prompts(
+            user=user, forecast=forecast, history=history,
+        )
+        return self._stream_and_log(
+            system_prompt,
+            user_prompt,
+            lambda content: AIRecommendationLog(user=user, month_key='', type='forecast_explanation', content=content),
+            force_refresh=force_refresh,
+        )
+
+    def generate_goal_insights(
+        self,
+        *,
+        user,
+        goal,
+        summaries: List[Any],
+        history: List[Any],
+        forecast: Optional[Dict[str, Any]],
+        force_refresh: bool = False,
+    ) -> Dict[str, Optional[str]]:
+        """Goal advice and forecast explanation in one round-trip.
+
+        Both prompts are independent, so they are sent concurrently. The forecast
+        explanation is skipped when there is no usable forecast.
+        """
+        prompts = [self._goal_advice_prompts(user=user, goal=goal, history=history, forecast=forecast)]
+        if forecast:
+            prompts.append(self._forecast_explanation_prompts(user=user, forecast=forecast, history=summaries))
+
+        results = self._chat_many(prompts, force_refresh=force_refresh)
+
+        logs = []
+        if not results[0].placeholder:
+            logs.append(AIRecommendationLog(user=user, goal=goal, type='goal_advice', content=results[0].content))
+        if forecast and not results[1].placeholder:
+            logs.append(AIRecommendationLog(user=user, month_key='', type='forecast_explanation', content=results[1].content))
+        if logs:
+            _save_logs(logs)
+
+        return {
+            'advice': results[0].content,
+            'explanation': results[1].content if forecast else None,
+        }
@@ -1,3 +1,236 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ai.models import AIRecommendationLog
+from ai.services import _BREAKER, AIResponse, AIService, AIServiceError
+from goals.models import Goal
+
+
+@override_settings(DEEPSEEK_API_URL='http://deepseek.test/v1/chat/completions')
+class ChatCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _BREAKER.reset()
+        self.addCleanup(_BREAKER.reset)
+        self.response = mock.Mock()
+        self.response.json.return_value = {'choices': [{'message': {'content': 'ok'}}]}
+
+    def test_identical_prompts_hit_cache(self):
+        service = AIService()
+        with mock.patch.object(service.session, 'post', return_value=self.response) as post:
+            first = service._chat(system_prompt='sys', user_prompt='user')
+            second = service._chat(system_prompt='sys', user_prompt='user')
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(first.content, 'ok')
+        self.assertEqual(second.content, 'ok')
+        self.assertIsNone(second.raw)
+
+    def test_force_refresh_bypasses_cache(self):
+        service = AIService()
+        with mock.patch.object(service.session, 'post', return_value=self.response) as post:
+            service._chat(system_prompt='sys', user_prompt='user')
+            service._chat(system_prompt='sys', user_prompt='user', force_refresh=True)
+
+        self.assertEqual(post.call_count, 2)
+
+    @override_settings(DEEPSEEK_MAX_RETRIES=1)
+    def test_timeout_is_retried(self):
+        service = AIService()
+        with mock.patch.object(
+            service.session, 'post', side_effect=[requests.Timeout(), self.response],
+        ) as post:
+            result = service._chat(system_prompt='sys', user_prompt='user')
+
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(result.content, 'ok')
+
+    @override_settings(DEEPSEEK_MAX_RETRIES=1)
+    def test_timeout_exhausts_retries(self):
+        service = AIService()
+        with mock.patch.object(service.session, 'post', side_effect=requests.Timeout()) as post:
+            with self.assertRaises(AIServiceError):
+                service._chat(system_prompt='sys', user_prompt='user')
+
+        self.assertEqual(post.call_count, 2)
+
+    def test_breaker_short_circuits_after_repeated_outages(self):
+        service = AIService()
+        service.max_retries = 0
+        with mock.patch.object(service.session, 'post', side_effect=requests.ConnectionError()) as post:
+            for _ in range(_BREAKER.fail_max):
+                with self.assertRaises(AIServiceError):
+                    service._chat(system_prompt='sys', user_prompt='user', force_refresh=True)
+            result = service._chat(system_prompt='sys', user_prompt='user', force_refresh=True)
+
+        self.assertEqual(post.call_count, _BREAKER.fail_max)
+        self.assertIsNone(result.raw)
+        self.assertIn('недоступен', result.content)
+
+    def test_stream_yields_deltas_and_caches_full_text(self):
+        stream = mock.MagicMock()
+        stream.__enter__.return_value = stream
+        stream.iter_lines.return_value = [
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            '',
+            'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+            'data: {"choices": [{"delta": {"content": "lo"}}]}',
+            'data: [DONE]',
+        ]
+        service = AIService()
+        with mock.patch.object(service.session, 'post', return_value=stream) as post:
+            deltas = list(service._chat_stream(system_prompt='sys', user_prompt='user'))
+            cached = service._chat(system_prompt='sys', user_prompt='user')
+
+        self.assertEqual(deltas, ['Hel', 'lo'])
+        self.assertEqual(post.call_count, 1)
+        self.assertTrue(post.call_args.kwargs['stream'])
+        self.assertEqual(cached.content, 'Hello')
+
+    def test_stream_decodes_utf8_without_charset(self):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.headers['Content-Type'] = 'text/event-stream'
+        # What the HTTP adapter sets for a text/* response without a charset
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.raw = io.BytesIO(
+            'data: {"choices": [{"delta": {"content": "Привет"}}]}\n\ndata: [DONE]\n\n'.encode('utf-8')
+        )
+        service = AIService()
+        with mock.patch.object(service.session, 'post', return_value=resp):
+            deltas = list(service._chat_stream(system_prompt='sys', user_prompt='user'))
+
+        self.assertEqual(deltas, ['Привет'])
+
+    @override_settings(AI_LOG_IN_BACKGROUND=False)
+    def test_stream_placeholder_is_not_logged(self):
+        user = User.objects.create_user(username='u1', password='pass')
+        summary = mock.Mock(total_income=Decimal('100'), total_expense=Decimal('50'), profit=Decimal('50'))
+        service = AIService()
+        for _ in range(_BREAKER.fail_max):
+            _BREAKER.record_failure()
+
+        with mock.patch.object(service.session, 'post') as post:
+            deltas = list(service.generate_monthly_report_stream(
+                user=user, month_key='2025-01', summary=summary, top_categories=[],
+            ))
+
+        post.assert_not_called()
+        self.assertEqual(len(deltas), 1)
+        self.assertIn('недоступен', deltas[0])
+        self.assertFalse(AIRecommendationLog.objects.exists())
+
+
+@override_settings(AI_LOG_IN_BACKGROUND=False)
+class GoalInsightsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.goal = Goal.objects.create(
+            user=self.user,
+            title='Save for laptop',
+            description='',
+            target_amount=Decimal('1000.00'),
+            target_date=date.today() + timedelta(days=180),
+            status='active',
+        )
+
+    def test_insights_without_forecast_skip_explanation(self):
+        with mock.patch.object(AIService, '_chat', return_value=AIResponse(content='advice')) as chat:
+            result = AIService().generate_goal_insights(
+                user=self.user, goal=self.goal, summaries=[], history=[], forecast=None,
+            )
+
+        self.assertEqual(chat.call_count, 1)
+        self.assertEqual(result, {'advice': 'advice', 'explanation': None})
+        self.assertEqual(AIRecommendationLog.objects.filter(user=self.user).count(), 1)
+
+    def test_insights_with_forecast_log_both(self):
+        forecast = {
+            'status': 'ok',
+            'predicted_profit': '130.00',
+            'lower': '120.00',
+            'upper': '140.00',
+            'algorithm': 'linear_regression_profit_trend',
+            'used_months': 3,
+        }
+
+        def fake_chat(self, *, system_prompt, user_prompt, force_refresh=False):
+            return AIResponse(content='explanation' if 'Прогноз на следующий месяц' in user_prompt else 'advice')
+
+        with mock.patch.object(AIService, '_chat', fake_chat):
+            result = AIService().generate_goal_insights(
+                user=self.user, goal=self.goal, summaries=[], history=[], forecast=forecast,
+            )
+
+        self.assertEqual(result, {'advice': 'advice', 'explanation': 'explanation'})
+        self.assertEqual(
+            set(AIRecommendationLog.objects.filter(user=self.user).values_list('type', flat=True)),
+            {'goal_advice', 'forecast_explanation'},
+        )
+
+    @override_settings(AI_LOG_IN_BACKGROUND=True)
+    def test_logs_are_deferred_until_commit(self):
+        with mock.patch.object(AIService, '_chat', return_value=AIResponse(content='advice')), \
+                mock.patch('ai.services._LOG_EXECUTOR') as executor:
+            with self.captureOnCommitCallbacks() as callbacks:
+                AIService().generate_goal_insights(
+                    user=self.user, goal=self.goal, summaries=[], history=[], forecast=None,
+                )
+                executor.submit.assert_not_called()
+
+            self.assertEqual(len(callbacks), 1)
+            callbacks[0]()
+            executor.submit.assert_called_once()
+
+        self.assertFalse(AIRecommendationLog.objects.filter(user=self.user).exists())
+
+
+class MonthlyReportsBulkTests(TestCase):
+    def test_failed_report_is_skipped(self):
+        ok_user = User.objects.create_user(username='ok', password='pass')
+        bad_user = User.objects.create_user(username='bad', password='pass')
+        summary = mock.Mock(total_income=Decimal('100'), total_expense=Decimal('50'), profit=Decimal('50'))
+
+        def fake_chat(self, *, system_prompt, user_prompt, force_refresh=False):
+            if 'bad-month' in user_prompt:
+                raise AIServiceError('boom')
+            return AIResponse(content='report')
+
+        with mock.patch.object(AIService, '_chat', fake_chat):
+            reports = AIService().generate_monthly_reports_bulk([
+                (ok_user, '2025-01', summary, []),
+                (bad_user, 'bad-month', summary, []),
+            ])
+
+        self.assertEqual(reports, {ok_user.pk: 'report'})
+        self.assertEqual(
+            list(AIRecommendationLog.objects.values_list('user_id', 'type')),
+            [(ok_user.pk, 'monthly_report')],
+        )
+
+    @override_settings(DEEPSEEK_API_URL='http://deepseek.test/v1/chat/completions')
+    def test_open_breaker_skips_remaining_reports(self):
+        cache.clear()
+        _BREAKER.reset()
+        self.addCleanup(_BREAKER.reset)
+        summary = mock.Mock(total_income=Decimal('100'), total_expense=Decimal('50'), profit=Decimal('50'))
+        items = [
+            (User.objects.create_user(username=f'u{i}', password='pass'), f'2025-{i + 1:02d}', summary, [])
+            for i in range(_BREAKER.fail_max + 2)
+        ]
+        service = AIService()
+        service.max_retries = 0
+
+        with mock.patch.object(service.session, 'post', side_effect=requests.ConnectionError()) as post:
+            reports = service.generate_monthly_reports_bulk(items, max_workers=1)
+
+        self.assertEqual(post.call_count, _BREAKER.fail_max)
+        self.assertEqual(reports, {})
+        self.assertFalse(AIRecommendationLog.objects.exists())
@@ -5,4 +5,5 @@ urlpatterns = [
     path('monthly-report/', views.monthly_report, name='ai-monthly-report'),
     path('goal-advice/', views.goal_advice, name='ai-goal-advice'),
     path('forecast/', views.forecast_view, name='ai-forecast'),
+    path('goal-insights/', views.goal_insights, name='ai-goal-insights'),
 ]
@@ -1,5 +1,10 @@
+import json
+
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.fields import BooleanField
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
@@ -10,10 +15,50 @@ from goals.models import Goal
 from ai.services import AIService, AIServiceError
 
 
+def _force_refresh(request) -> bool:
+    return request.data.get('force_refresh') in BooleanField.TRUE_VALUES
+
+
+def _wants_stream(request) -> bool:
+    return request.data.get('stream') in BooleanField.TRUE_VALUES
+
+
+def _sse_response(chunks, meta=None) -> StreamingHttpResponse:
+    """Relay LLM deltas as server-sent events so the client sees the first tokens immediately."""
+    def events():
+        if meta is not None:
+            yield f"event: meta\ndata: {json.dumps(meta, ensure_ascii=False)}\n\n"
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps({'delta': chunk}, ensure_ascii=False)}\n\n"
+        except AIServiceError as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _user_with_profile(request) -> User:
+    # Prompts read user.profile.currency; join it up front instead of a lazy SELECT per access.
+    return User.objects.select_related('profile').get(pk=request.user.pk)
+
+
+def _profit_history(user) -> list:
+    # Forecasting and prompts only read month_key/profit; materialize once and reuse.
+    return list(
+        MonthlySummary.objects.filter(user=user)
+        .only('month_key', 'profit')
+        .order_by('month_key')
+    )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def monthly_report(request):
-    user = request.user
+    user = _user_with_profile(request)
     month_key = request.data.get('month_key')
     if not month_key:
         from django.utils import timezone
@@ -27,12 +72,22 @@ def monthly_report(request):
     top_categories = AccountingService.top_expense_categories(user=user, month_key=month_key, limit=5)
 
     ai_service = AIService()
+    if _wants_stream(request):
+        return _sse_response(ai_service.generate_monthly_report_stream(
+            user=user,
+            month_key=month_key,
+            summary=summary,
+            top_categories=top_categories,
+            force_refresh=_force_refresh(request),
+        ))
+
     try:
         report = ai_service.generate_monthly_report(
             user=user,
             month_key=month_key,
             summary=summary,
             top_categories=top_categories,
+            force_refresh=_force_refresh(request),
         )
         return Response({'report': report}, status=status.HTTP_200_OK)
     except AIServiceError as e:
@@ -42,7 +97,7 @@ def monthly_report(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def goal_advice(request):
-    user = request.user
+    user = _user_with_profile(request)
     goal_id = request.data.get('goal_id')
 
     if not goal_id:
@@ -53,22 +108,32 @@ def goal_advice(request):
     except Goal.DoesNotExist:
         return Response({'error': 'Goal not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    summaries = MonthlySummary.objects.filter(user=user).order_by('month_key')
+    summaries = _profit_history(user)
     history = [
         {'month_key': s.month_key, 'profit': str(s.profit)}
         for s in summaries
     ]
 
-    forecast_result = ForecastService.forecast_next_month(list(summaries))
+    forecast_result = ForecastService.forecast_next_month(summaries)
     forecast_data = ForecastService.as_dict(forecast_result) if forecast_result.status == 'ok' else None
 
     ai_service = AIService()
+    if _wants_stream(request):
+        return _sse_response(ai_service.generate_goal_progress_advice_stream(
+            user=user,
+            goal=goal,
+            history=history,
+            forecast=forecast_data,
+            force_refresh=_force_refresh(request),
+        ))
+
     try:
         advice = ai_service.generate_goal_progress_advice(
             user=user,
             goal=goal,
             history=history,
             forecast=forecast_data,
+            force_refresh=_force_refresh(request),
         )
         return Response({'advice': advice}, status=status.HTTP_200_OK)
     except AIServiceError as e:
@@ -78,11 +143,11 @@ def goal_advice(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def forecast_view(request):
-    user = request.user
+    user = _user_with_profile(request)
 
-    summaries = MonthlySummary.objects.filter(user=user).order_by('month_key')
+    summaries = _profit_history(user)
 
-    result = ForecastService.forecast_next_month(list(summaries))
+    result = ForecastService.forecast_next_month(summaries)
 
     if result.status == 'insufficient_data':
         return Response({
@@ -91,11 +156,24 @@ def forecast_view(request):
         }, status=status.HTTP_200_OK)
 
     ai_service = AIService()
+    if _wants_stream(request):
+        forecast_data = ForecastService.as_dict(result)
+        return _sse_response(
+            ai_service.generate_forecast_explanation_stream(
+                user=user,
+                forecast=forecast_data,
+                history=summaries,
+                force_refresh=_force_refresh(request),
+            ),
+            meta=forecast_data,
+        )
+
     try:
         explanation = ai_service.generate_forecast_explanation(
             user=user,
             forecast=ForecastService.as_dict(result),
-            history=list(summaries),
+            history=summaries,
+            force_refresh=_force_refresh(request),
         )
         return Response({
             'status': 'ok',
@@ -108,3 +186,47 @@ def forecast_view(request):
         }, status=status.HTTP_200_OK)
     except AIServiceError as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def goal_insights(request):
+    """Goal advice + forecast explanation, with both LLM calls issued concurrently."""
+    user = _user_with_profile(request)
+    goal_id = request.data.get('goal_id')
+
+    if not goal_id:
+        return Response({'error': 'goal_id required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        goal = Goal.objects.get(id=goal_id, user=user)
+    except Goal.DoesNotExist:
+        return Response({'error': 'Goal not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    summaries = _profit_history(user)
+    history = [
+        {'month_key': s.month_key, 'profit': str(s.profit)}
+        for s in summaries
+    ]
+
+    forecast_result = ForecastService.forecast_next_month(summaries)
+    forecast_data = ForecastService.as_dict(forecast_result) if forecast_result.status == 'ok' else None
+
+    ai_service = AIService()
+    try:
+        insights = ai_service.generate_goal_insights(
+            user=user,
+            goal=goal,
+            summaries=summaries,
+            history=history,
+            forecast=forecast_data,
+            force_refresh=_force_refresh(request),
+        )
+    except AIServiceError as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return Response({
+        'advice': insights['advice'],
+        'forecast': forecast_data or {'status': forecast_result.status, 'used_months': forecast_result.used_months},
+        'explanation': insights['explanation'],
+    }, status=status.HTTP_200_OK)
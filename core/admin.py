@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db.models import Count
+from django.db.models.functions import Substr
 from .models import (
     Income, Expense, Event, Document, ChatSession, ChatMessage, UploadedFile, 
     UserProfile, UserGoal, Achievement, LearningModule, TeenChatSession, ScamAlert,
@@ -7,6 +9,19 @@ from .models import (
 )
 
 
+class DeferredListMixin:
+    """Skip large text/JSON columns on the changelist; the change form still loads them."""
+    list_defer = ()
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        match = request.resolver_match
+        changelist = f"{self.opts.app_label}_{self.opts.model_name}_changelist"
+        if self.list_defer and match and match.url_name == changelist:
+            qs = qs.defer(*self.list_defer)
+        return qs
+
+
 @admin.register(Income)
 class IncomeAdmin(admin.ModelAdmin):
     list_display = ('date', 'amount', 'income_type', 'user')
@@ -29,14 +44,16 @@ class EventAdmin(admin.ModelAdmin):
 
 
 @admin.register(Document)
-class DocumentAdmin(admin.ModelAdmin):
+class DocumentAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('params', 'generated_text')
     list_display = ('id', 'doc_type', 'user', 'created_at')
     list_filter = ('doc_type', 'created_at', 'user')
     search_fields = ('user__username',)
 
 
 @admin.register(UploadedFile)
-class UploadedFileAdmin(admin.ModelAdmin):
+class UploadedFileAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('metadata',)
     list_display = ('original_name', 'file_type', 'user', 'file_size', 'uploaded_at', 'processed')
     list_filter = ('file_type', 'processed', 'uploaded_at', 'user')
     search_fields = ('original_name', 'user__username')
@@ -44,26 +61,40 @@ class UploadedFileAdmin(admin.ModelAdmin):
 
 
 @admin.register(ChatSession)
-class ChatSessionAdmin(admin.ModelAdmin):
+class ChatSessionAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('data_summaries', 'analytics_summaries', 'action_log')
     list_display = ('session_id', 'title', 'user', 'created_at', 'updated_at', 'message_count')
     list_filter = ('created_at', 'user')
     readonly_fields = ('created_at', 'updated_at')
     search_fields = ('session_id', 'title', 'user__username')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_message_count=Count('messages'))
+    
     def message_count(self, obj):
-        return obj.messages.count()
+        return obj._message_count
     message_count.short_description = 'Сообщений'
+    message_count.admin_order_field = '_message_count'
 
 
 @admin.register(ChatMessage)
-class ChatMessageAdmin(admin.ModelAdmin):
+class ChatMessageAdmin(DeferredListMixin, admin.ModelAdmin):
     list_display = ('id', 'session', 'role', 'content_preview', 'user', 'created_at')
     list_filter = ('role', 'created_at', 'session')
     readonly_fields = ('created_at', 'content_hash')
     search_fields = ('content', 'session__session_id', 'session__user__username')
+    list_defer = ('content', 'encrypted_content', 'metadata')
+    
+    def get_queryset(self, request):
+        # The list only shows 50 characters, so let the database cut them out.
+        return (
+            super().get_queryset(request)
+            .annotate(preview=Substr('content', 1, 51))
+            .select_related('session__user')
+        )
     
     def content_preview(self, obj):
-        return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
+        return obj.preview[:50] + '...' if len(obj.preview) > 50 else obj.preview
     content_preview.short_description = 'Содержание'
     
     def user(self, obj):
@@ -80,7 +111,8 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserGoal)
-class UserGoalAdmin(admin.ModelAdmin):
+class UserGoalAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('description', 'ai_recommendation')
     list_display = ('user', 'title', 'category', 'progress_percentage', 'target_date', 'status')
     list_filter = ('category', 'status', 'target_date')
     search_fields = ('user__username', 'title', 'description')
@@ -98,21 +130,24 @@ class AchievementAdmin(admin.ModelAdmin):
 
 
 @admin.register(LearningModule)
-class LearningModuleAdmin(admin.ModelAdmin):
+class LearningModuleAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('description', 'content', 'learning_objectives', 'tags', 'ai_summary', 'real_world_examples')
     list_display = ('title', 'difficulty', 'category', 'is_published', 'estimated_time')
     list_filter = ('difficulty', 'category', 'is_published')
     search_fields = ('title', 'description')
 
 
 @admin.register(TeenChatSession)
-class TeenChatSessionAdmin(admin.ModelAdmin):
+class TeenChatSessionAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('conversation_context',)
     list_display = ('session_id', 'user', 'title', 'created_at', 'updated_at')
     list_filter = ('created_at', 'user')
     search_fields = ('session_id', 'title', 'user__username')
 
 
 @admin.register(ScamAlert)
-class ScamAlertAdmin(admin.ModelAdmin):
+class ScamAlertAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_defer = ('reported_text', 'red_flags', 'explanation', 'safe_alternatives')
     list_display = ('user', 'severity', 'risk_score', 'is_suspicious', 'created_at')
     list_filter = ('severity', 'is_suspicious', 'created_at')
     search_fields = ('user__username', 'reported_text')
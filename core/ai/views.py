@@ -17,7 +17,8 @@ import uuid
 from core.models import ChatSession, ChatMessage
 from core.ai.advisor import get_financial_advice
 from core.utils.analytics import parse_actionable_items
-from core.llm import _compute_content_hash
+from core.utils.responses import parse_json_body
+from core.llm import _compute_content_hash, split_near_duplicate_marker
 
 
 @login_required
@@ -38,7 +39,7 @@ def ai_chat_api_v2(request):
     # Парсим запрос
     try:
         if request.content_type == 'application/json':
-            data = json.loads(request.body)
+            data = parse_json_body(request)
         else:
             data = request.POST.dict()
     except:
@@ -116,12 +117,14 @@ def ai_chat_api_v2(request):
         context_used = result.get('context_used', {})
         metadata = result.get('metadata', {})
         
-        # 3. Сохраняем сообщение ассистента
+        # 3. Сохраняем сообщение ассистента (пометка о повторе только для показа, не в историю)
+        stored_reply, near_duplicate = split_near_duplicate_marker(reply)
         assistant_msg = ChatMessage.objects.create(
             session=session,
             role='assistant',
-            content=reply,
-            content_hash=_compute_content_hash(reply)
+            content=stored_reply,
+            content_hash=_compute_content_hash(stored_reply),
+            metadata={'near_duplicate': near_duplicate},
         )
         
         # Извлекаем actionable советы
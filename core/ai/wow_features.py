@@ -12,6 +12,7 @@ from typing import Generator
 
 from core.ai.advisor import get_financial_advice
 from core.models import Income, Expense
+from core.utils.responses import parse_json_body
 from datetime import date, timedelta
 import numpy as np
 from collections import Counter
@@ -42,7 +43,7 @@ def ai_chat_streaming(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'POST only'}, status=405)
     
-    data = json.loads(request.body)
+    data = parse_json_body(request)
     query = data.get('message', '')
     
     def generate_response() -> Generator[str, None, None]:
@@ -131,7 +132,7 @@ def ai_confidence_score(request):
     - Наличие аномалий
     - Длина истории
     """
-    data = json.loads(request.body)
+    data = parse_json_body(request)
     query = data.get('message', '')
     
     # Анализируем сколько данных есть
@@ -360,7 +361,7 @@ def ai_explain_reasoning(request):
     3. Как пришел к выводу
     """
     try:
-        data = json.loads(request.body)
+        data = parse_json_body(request)
         query = data.get('message', '')
         
         # Простой reasoning chain без сложного анализа
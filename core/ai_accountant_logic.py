@@ -1,101 +1,132 @@
-import pandas as pd
-import numpy as np
 from datetime import datetime, date, timedelta
-from django.db.models import Sum, Avg
+from statistics import fmean
+from django.db.models import Avg, Case, DecimalField, F, Sum, Value, When
 from .models import Income, Expense, Transaction, MonthlySummary, UserGoal, AIRecommendationLog
 from .llm import chat_with_context
 
 def sync_transactions_from_legacy(user):
     """Sync Income and Expense models to unified Transaction model"""
-    # Sync Incomes
-    incomes = Income.objects.filter(user=user)
-    for inc in incomes:
-        Transaction.objects.update_or_create(
+    # bulk_create skips Transaction.save(), so month_key is filled in here.
+    transactions = [
+        Transaction(
             user=user,
             legacy_id=inc.id,
             legacy_type='income',
-            defaults={
-                'date': inc.date,
-                'amount': inc.amount,
-                'type': 'income',
-                'category': inc.get_income_type_display(),
-                'description': inc.description or "",
-                'source': inc.source or 'legacy'
-            }
+            date=inc.date,
+            amount=inc.amount,
+            type='income',
+            category=inc.get_income_type_display(),
+            description=inc.description or "",
+            source=inc.source or 'legacy',
+            month_key=inc.date.strftime('%Y-%m'),
         )
-    
-    # Sync Expenses
-    expenses = Expense.objects.filter(user=user)
-    for exp in expenses:
-        Transaction.objects.update_or_create(
+        for inc in Income.objects.filter(user=user).only('id', 'date', 'amount', 'income_type', 'description', 'source')
+    ]
+    transactions += [
+        Transaction(
             user=user,
             legacy_id=exp.id,
             legacy_type='expense',
-            defaults={
-                'date': exp.date,
-                'amount': -exp.amount,
-                'type': 'expense',
-                'category': exp.get_expense_type_display(),
-                'description': exp.description or "",
-                'source': 'legacy'
-            }
+            date=exp.date,
+            amount=-exp.amount,
+            type='expense',
+            category=exp.get_expense_type_display(),
+            description=exp.description or "",
+            source='legacy',
+            month_key=exp.date.strftime('%Y-%m'),
         )
+        for exp in Expense.objects.filter(user=user).only('id', 'date', 'amount', 'expense_type', 'description')
+    ]
+
+    Transaction.objects.bulk_create(
+        transactions,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user', 'legacy_id', 'legacy_type'],
+        update_fields=['date', 'amount', 'type', 'category', 'description', 'source', 'month_key'],
+    )
 
-def calculate_monthly_summaries(user):
-    """Calculate and store MonthlySummary from Transaction model"""
+def calculate_monthly_summaries(user, month_keys=None):
+    """Calculate and store MonthlySummary from Transaction model.
+
+    Pass `month_keys` to recompute only those months; the Transaction signals
+    use this so a single change costs one grouped query for its month.
+    """
     transactions = Transaction.objects.filter(user=user)
-    if not transactions.exists():
-        return
-    
-    data = []
-    for tx in transactions:
-        data.append({
-            'month_key': tx.month_key,
-            'amount': float(tx.amount),
-            'type': tx.type
-        })
-    
-    df = pd.DataFrame(data)
-    
-    summary = df.groupby('month_key').apply(lambda x: pd.Series({
-        'total_income': x[x['type'] == 'income']['amount'].sum(),
-        'total_expense': -x[x['type'] == 'expense']['amount'].sum(),
-    })).reset_index()
-    
-    summary['profit'] = summary['total_income'] - summary['total_expense']
-    
-    for _, row in summary.iterrows():
-        MonthlySummary.objects.update_or_create(
+    if month_keys is not None:
+        transactions = transactions.filter(month_key__in=month_keys)
+
+    # Expense amounts are stored negative, so they are flipped back while summing.
+    rows = (
+        transactions
+        .values('month_key')
+        .annotate(
+            total_income=Sum(Case(When(type='income', then='amount'), default=Value(0), output_field=DecimalField())),
+            total_expense=Sum(Case(When(type='expense', then=-F('amount')), default=Value(0), output_field=DecimalField())),
+        )
+        .order_by()
+    )
+
+    summaries = [
+        MonthlySummary(
             user=user,
             month_key=row['month_key'],
-            defaults={
-                'total_income': row['total_income'],
-                'total_expense': row['total_expense'],
-                'profit': row['profit']
-            }
+            total_income=row['total_income'],
+            total_expense=row['total_expense'],
+            profit=row['total_income'] - row['total_expense'],
         )
+        for row in rows
+    ]
+
+    if month_keys is not None:
+        # Months that lost their last transaction are zeroed, never created.
+        emptied = set(month_keys) - {s.month_key for s in summaries}
+        if emptied:
+            MonthlySummary.objects.filter(user=user, month_key__in=emptied).update(
+                total_income=0, total_expense=0, profit=0,
+            )
+
+    if not summaries:
+        return
+
+    MonthlySummary.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=['user', 'month_key'],
+        update_fields=['total_income', 'total_expense', 'profit'],
+    )
 
 def get_profit_forecast(user):
     """
     Predict next month profit and provide AI explanation.
     """
-    summaries = MonthlySummary.objects.filter(user=user).order_by('month_key')
-    if summaries.count() < 3:
+    rows = list(
+        MonthlySummary.objects.filter(user=user)
+        .order_by('month_key')
+        .values_list('month_key', 'profit')
+    )
+    if len(rows) < 3:
         # Qualitative advice only
         prompt = "Данных о прибыли за последние 3 месяца недостаточно. Дай общие советы по увеличению прибыли и экономии для пользователя FinTech приложения."
         advice = chat_with_context([], user_data=prompt, user=user)
         return None, advice
     
-    profits = [float(s.profit) for s in summaries]
-    x = np.arange(len(profits))
-    y = np.array(profits)
-    z = np.polyfit(x, y, 1)
-    p = np.poly1d(z)
+    # Closed-form least squares for a degree-1 fit. Histories are a few dozen
+    # months at most, so plain Python beats importing numpy for it.
+    n = len(rows)
+    y = [float(profit) for _, profit in rows]
+    x_mean = (n - 1) / 2
+    y_mean = fmean(y)
+    slope = (
+        sum((i - x_mean) * (profit - y_mean) for i, profit in enumerate(y))
+        / sum((i - x_mean) ** 2 for i in range(n))
+    )
+    intercept = y_mean - slope * x_mean
     
-    forecasted_profit = p(len(profits))
+    forecasted_profit = slope * n + intercept
     
     # AI Explanation
-    history_str = "\n".join([f"{s.month_key}: Прибыль {s.profit}" for s in summaries])
+    history_str = "\n".join(f"{month_key}: Прибыль {profit}" for month_key, profit in rows)
     prompt = f"""
 Проанализируй историю прибыли пользователя и объясни прогноз на следующий месяц.
 История:
@@ -5,12 +5,18 @@ Handles achievements, streaks, badges, and engagement mechanics
 
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Callable, Dict, List, Any, Mapping, Optional, Tuple
 from datetime import datetime, timedelta, date
 from dataclasses import dataclass
 
 from django.contrib.auth.models import User
-from django.db.models import Q, Count, Sum, Avg
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Q, Count, Sum, Avg, ExpressionWrapper, F, FloatField, Max, Min
+from django.db.models.functions import NullIf
 from django.utils import timezone
 
 from ..models import (
@@ -21,6 +27,41 @@ from ..models import (
 
 logger = logging.getLogger(__name__)
 
+# Every level takes the same number of points
+POINTS_PER_LEVEL = 100
+
+# Active achievements only change on deploys or admin edits, so keep them in the cache
+ACTIVE_ACHIEVEMENTS_CACHE_KEY = 'gam:achievements:active'
+ACTIVE_ACHIEVEMENTS_CACHE_SECONDS = 60 * 60
+
+
+def get_active_achievements() -> List[Achievement]:
+    """Return active achievements, served from the cache when possible"""
+    return cache.get_or_set(
+        ACTIVE_ACHIEVEMENTS_CACHE_KEY,
+        lambda: list(Achievement.objects.filter(is_active=True)),
+        ACTIVE_ACHIEVEMENTS_CACHE_SECONDS,
+    )
+
+
+def invalidate_active_achievements():
+    """Drop the cached active achievements after the table changes"""
+    cache.delete(ACTIVE_ACHIEVEMENTS_CACHE_KEY)
+
+
+# Dashboard payloads are cached per user; signals drop them when the user's
+# achievements, profile or progress change, and the TTL bounds everything else
+DASHBOARD_CACHE_SECONDS = 60
+
+
+def dashboard_cache_key(user_id: int) -> str:
+    return f'gam:dash:{user_id}'
+
+
+def invalidate_user_dashboard(user_id: int):
+    """Drop the cached dashboard payload for a user"""
+    cache.delete(dashboard_cache_key(user_id))
+
 
 @dataclass
 class AchievementCheck:
@@ -32,6 +73,294 @@ class AchievementCheck:
     message: str
 
 
+# Predefined achievement templates, built once at import and shared by every engine
+_ACHIEVEMENT_TEMPLATES: Tuple[Mapping[str, Any], ...] = tuple(MappingProxyType(template) for template in (
+    # First Steps Achievements
+    {
+        'title': 'Первые шаги',
+        'description': 'Зарегистрировался в приложении и начал свой финансовый путь',
+        'category': 'milestone',
+        'icon': '🚀',
+        'criteria': {'type': 'registration'},
+        'points': 10,
+        'iq_bonus': 1
+    },
+    {
+        'title': 'Первая цель',
+        'description': 'Поставил свою первую финансовую цель',
+        'category': 'goal',
+        'icon': '🎯',
+        'criteria': {'type': 'first_goal_created'},
+        'points': 15,
+        'iq_bonus': 2
+    },
+    {
+        'title': 'Первый бюджет',
+        'description': 'Создал свой первый месячный бюджет',
+        'category': 'budgeting',
+        'icon': '📊',
+        'criteria': {'type': 'first_budget_created'},
+        'points': 15,
+        'iq_bonus': 2
+    },
+
+    # Learning Achievements
+    {
+        'title': 'Ученик',
+        'description': 'Завершил первый урок по финансовой грамотности',
+        'category': 'learning',
+        'icon': '📚',
+        'criteria': {'type': 'lessons_completed', 'value': 1},
+        'points': 20,
+        'iq_bonus': 3
+    },
+    {
+        'title': 'Знаток',
+        'description': 'Завершил 5 уроков по финансовой грамотности',
+        'category': 'learning',
+        'icon': '🧠',
+        'criteria': {'type': 'lessons_completed', 'value': 5},
+        'points': 50,
+        'iq_bonus': 5
+    },
+    {
+        'title': 'Эксперт',
+        'description': 'Завершил 10 уроков и стал настоящим экспертом',
+        'category': 'learning',
+        'icon': '🏆',
+        'criteria': {'type': 'lessons_completed', 'value': 10},
+        'points': 100,
+        'iq_bonus': 10
+    },
+    {
+        'title': 'Отличник',
+        'description': 'Успешно прошел 5 квизов',
+        'category': 'learning',
+        'icon': '⭐',
+        'criteria': {'type': 'quizzes_passed', 'value': 5},
+        'points': 40,
+        'iq_bonus': 4
+    },
+
+    # Goal Achievement
+    {
+        'title': 'Мечтатель',
+        'description': 'Поставил цель накопить на что-то важное',
+        'category': 'goal',
+        'icon': '💭',
+        'criteria': {'type': 'goals_created', 'value': 1},
+        'points': 15,
+        'iq_bonus': 2
+    },
+    {
+        'title': 'Накопитель',
+        'description': 'Накопил 50% от цели',
+        'category': 'saving',
+        'icon': '💰',
+        'criteria': {'type': 'goal_progress', 'value': 50},
+        'points': 30,
+        'iq_bonus': 3
+    },
+    {
+        'title': 'Достигатор',
+        'description': 'Достиг своей первой финансовой цели',
+        'category': 'goal',
+        'icon': '🎉',
+        'criteria': {'type': 'goals_achieved', 'value': 1},
+        'points': 75,
+        'iq_bonus': 8
+    },
+    {
+        'title': 'Чемпион целей',
+        'description': 'Достиг 5 финансовых целей',
+        'category': 'goal',
+        'icon': '👑',
+        'criteria': {'type': 'goals_achieved', 'value': 5},
+        'points': 150,
+        'iq_bonus': 15
+    },
+
+    # Budgeting Mastery
+    {
+        'title': 'Бюджетный мастер',
+        'description': 'Ведешь бюджет 7 дней подряд',
+        'category': 'budgeting',
+        'icon': '📋',
+        'criteria': {'type': 'budget_streak', 'value': 7},
+        'points': 40,
+        'iq_bonus': 4
+    },
+    {
+        'title': 'Экономист',
+        'description': 'Успешно уложился в бюджет 3 месяца подряд',
+        'category': 'budgeting',
+        'icon': '💡',
+        'criteria': {'type': 'budget_success_streak', 'value': 3},
+        'points': 80,
+        'iq_bonus': 8
+    },
+
+    # AI Coach Engagement
+    {
+        'title': 'Первый разговор',
+        'description': 'Провел первую беседу с AI финансовым коучем',
+        'category': 'learning',
+        'icon': '💬',
+        'criteria': {'type': 'first_ai_chat'},
+        'points': 25,
+        'iq_bonus': 3
+    },
+    {
+        'title': 'Любознательный',
+        'description': 'Задал 10 вопросов AI коучу',
+        'category': 'learning',
+        'icon': '🤔',
+        'criteria': {'type': 'ai_chats', 'value': 10},
+        'points': 50,
+        'iq_bonus': 5
+    },
+    {
+        'title': 'Постоянный ученик',
+        'description': 'Общался с AI коучем 30 дней подряд',
+        'category': 'streak',
+        'icon': '📖',
+        'criteria': {'type': 'ai_chat_streak', 'value': 30},
+        'points': 100,
+        'iq_bonus': 10
+    },
+
+    # Smart Spending
+    {
+        'title': 'Умный покупатель',
+        'description': 'Потратил меньше запланированного 5 раз',
+        'category': 'saving',
+        'icon': '🛒',
+        'criteria': {'type': 'under_budget_count', 'value': 5},
+        'points': 35,
+        'iq_bonus': 4
+    },
+    {
+        'title': 'Транжира-исправитель',
+        'description': 'Сократил траты на развлечения на 20%',
+        'category': 'saving',
+        'icon': '🎮➡️📚',
+        'criteria': {'type': 'entertainment_reduction', 'value': 20},
+        'points': 60,
+        'iq_bonus': 6
+    },
+
+    # Security & Safety
+    {
+        'title': 'Защитник',
+        'description': 'Использовал модуль защиты от мошенничества',
+        'category': 'security',
+        'icon': '🛡️',
+        'criteria': {'type': 'scam_checks', 'value': 1},
+        'points': 30,
+        'iq_bonus': 3
+    },
+    {
+        'title': 'Анти-скам герой',
+        'description': 'Выявил 5 подозрительных предложений',
+        'category': 'security',
+        'icon': '🦸‍♂️',
+        'criteria': {'type': 'scams_identified', 'value': 5},
+        'points': 75,
+        'iq_bonus': 8
+    },
+
+    # Streak Achievements
+    {
+        'title': 'Постоянство',
+        'description': 'Заходил в приложение 7 дней подряд',
+        'category': 'streak',
+        'icon': '🔥',
+        'criteria': {'type': 'login_streak', 'value': 7},
+        'points': 25,
+        'iq_bonus': 3
+    },
+    {
+        'title': 'Привычка',
+        'description': 'Заходил в приложение 30 дней подряд',
+        'category': 'streak',
+        'icon': '💪',
+        'criteria': {'type': 'login_streak', 'value': 30},
+        'points': 100,
+        'iq_bonus': 10
+    },
+    {
+        'title': 'Неукротимый',
+        'description': 'Заходил в приложение 100 дней подряд',
+        'category': 'streak',
+        'icon': '⚡',
+        'criteria': {'type': 'login_streak', 'value': 100},
+        'points': 250,
+        'iq_bonus': 25
+    },
+
+    # Special Achievements
+    {
+        'title': 'Финансовый гений',
+        'description': 'Достиг максимального уровня Financial IQ (100)',
+        'category': 'learning',
+        'icon': '🧠💎',
+        'criteria': {'type': 'financial_iq', 'value': 100},
+        'points': 200,
+        'iq_bonus': 20
+    },
+    {
+        'title': 'Мастер финансов',
+        'description': 'Получил все основные достижения',
+        'category': 'milestone',
+        'icon': '🏅',
+        'criteria': {'type': 'all_achievements'},
+        'points': 500,
+        'iq_bonus': 50
+    }
+))
+
+# Criteria types that compare a single counter against the required value,
+# mapped to the metrics key holding that counter
+_COUNTER_CRITERIA = {
+    'lessons_completed': 'lessons_completed',
+    'quizzes_passed': 'quizzes_passed',
+    'goals_created': 'goals_created',
+    'goals_achieved': 'goals_achieved',
+    'goal_progress': 'max_goal_progress',
+    'financial_iq': 'financial_iq',
+    'ai_chats': 'ai_chats',
+    'scam_checks': 'scam_checks',
+    'scams_identified': 'scams_identified',
+    'login_streak': 'current_streak',
+    'budget_streak': 'budget_streak',
+}
+
+
+def _counter_handler(key: str) -> Callable[[Dict[str, Any], Any], Tuple[bool, Dict[str, Any]]]:
+    """Build a handler that unlocks once metrics[key] reaches the required value"""
+    return lambda metrics, required: (metrics[key] >= required, {key: metrics[key]})
+
+
+# criteria type -> handler(metrics, required_value) returning (unlocked, progress_data)
+_CRITERIA_HANDLERS: Dict[str, Callable[[Dict[str, Any], Any], Tuple[bool, Dict[str, Any]]]] = {
+    criteria_type: _counter_handler(key) for criteria_type, key in _COUNTER_CRITERIA.items()
+}
+_CRITERIA_HANDLERS.update({
+    # Always true for registered users
+    'registration': lambda metrics, required: (
+        True, {'registration_date': metrics['registration_date']}
+    ),
+    'first_ai_chat': lambda metrics, required: (
+        metrics['ai_chats'] > 0, {'first_chat_date': metrics['first_chat_date']}
+    ),
+    # Check if user has all major achievements (80% threshold)
+    'all_achievements': lambda metrics, required: (
+        metrics['major_achievements'] >= metrics['total_major'] * 0.8,
+        {'major_achievements': metrics['major_achievements'], 'total_major': metrics['total_major']},
+    ),
+})
+
+
 class GamificationEngine:
     """
     Core gamification engine that manages achievements, streaks, and user engagement
@@ -40,592 +369,303 @@ class GamificationEngine:
     def __init__(self):
         self.achievement_templates = self._load_achievement_templates()
         
-    def _load_achievement_templates(self) -> List[Dict]:
+    def _load_achievement_templates(self) -> Tuple[Mapping[str, Any], ...]:
         """Load predefined achievement templates"""
-        return [
-            # First Steps Achievements
-            {
-                'title': 'Первые шаги',
-                'description': 'Зарегистрировался в приложении и начал свой финансовый путь',
-                'category': 'milestone',
-                'icon': '🚀',
-                'criteria': {'type': 'registration'},
-                'points': 10,
-                'iq_bonus': 1
-            },
-            {
-                'title': 'Первая цель',
-                'description': 'Поставил свою первую финансовую цель',
-                'category': 'goal',
-                'icon': '🎯',
-                'criteria': {'type': 'first_goal_created'},
-                'points': 15,
-                'iq_bonus': 2
-            },
-            {
-                'title': 'Первый бюджет',
-                'description': 'Создал свой первый месячный бюджет',
-                'category': 'budgeting',
-                'icon': '📊',
-                'criteria': {'type': 'first_budget_created'},
-                'points': 15,
-                'iq_bonus': 2
-            },
-            
-            # Learning Achievements
-            {
-                'title': 'Ученик',
-                'description': 'Завершил первый урок по финансовой грамотности',
-                'category': 'learning',
-                'icon': '📚',
-                'criteria': {'type': 'lessons_completed', 'value': 1},
-                'points': 20,
-                'iq_bonus': 3
-            },
-            {
-                'title': 'Знаток',
-                'description': 'Завершил 5 уроков по финансовой грамотности',
-                'category': 'learning',
-                'icon': '🧠',
-                'criteria': {'type': 'lessons_completed', 'value': 5},
-                'points': 50,
-                'iq_bonus': 5
-            },
-            {
-                'title': 'Эксперт',
-                'description': 'Завершил 10 уроков и стал настоящим экспертом',
-                'category': 'learning',
-                'icon': '🏆',
-                'criteria': {'type': 'lessons_completed', 'value': 10},
-                'points': 100,
-                'iq_bonus': 10
-            },
-            {
-                'title': 'Отличник',
-                'description': 'Успешно прошел 5 квизов',
-                'category': 'learning',
-                'icon': '⭐',
-                'criteria': {'type': 'quizzes_passed', 'value': 5},
-                'points': 40,
-                'iq_bonus': 4
-            },
-            
-            # Goal Achievement
-            {
-                'title': 'Мечтатель',
-                'description': 'Поставил цель накопить на что-то важное',
-                'category': 'goal',
-                'icon': '💭',
-                'criteria': {'type': 'goals_created', 'value': 1},
-                'points': 15,
-                'iq_bonus': 2
-            },
-            {
-                'title': 'Накопитель',
-                'description': 'Накопил 50% от цели',
-                'category': 'saving',
-                'icon': '💰',
-                'criteria': {'type': 'goal_progress', 'value': 50},
-                'points': 30,
-                'iq_bonus': 3
-            },
-            {
-                'title': 'Достигатор',
-                'description': 'Достиг своей первой финансовой цели',
-                'category': 'goal',
-                'icon': '🎉',
-                'criteria': {'type': 'goals_achieved', 'value': 1},
-                'points': 75,
-                'iq_bonus': 8
-            },
-            {
-                'title': 'Чемпион целей',
-                'description': 'Достиг 5 финансовых целей',
-                'category': 'goal',
-                'icon': '👑',
-                'criteria': {'type': 'goals_achieved', 'value': 5},
-                'points': 150,
-                'iq_bonus': 15
-            },
-            
-            # Budgeting Mastery
-            {
-                'title': 'Бюджетный мастер',
-                'description': 'Ведешь бюджет 7 дней подряд',
-                'category': 'budgeting',
-                'icon': '📋',
-                'criteria': {'type': 'budget_streak', 'value': 7},
-                'points': 40,
-                'iq_bonus': 4
-            },
-            {
-                'title': 'Экономист',
-                'description': 'Успешно уложился в бюджет 3 месяца подряд',
-                'category': 'budgeting',
-                'icon': '💡',
-                'criteria': {'type': 'budget_success_streak', 'value': 3},
-                'points': 80,
-                'iq_bonus': 8
-            },
-            
-            # AI Coach Engagement
-            {
-                'title': 'Первый разговор',
-                'description': 'Провел первую беседу с AI финансовым коучем',
-                'category': 'learning',
-                'icon': '💬',
-                'criteria': {'type': 'first_ai_chat'},
-                'points': 25,
-                'iq_bonus': 3
-            },
-            {
-                'title': 'Любознательный',
-                'description': 'Задал 10 вопросов AI коучу',
-                'category': 'learning',
-                'icon': '🤔',
-                'criteria': {'type': 'ai_chats', 'value': 10},
-                'points': 50,
-                'iq_bonus': 5
-            },
-            {
-                'title': 'Постоянный ученик',
-                'description': 'Общался с AI коучем 30 дней подряд',
-                'category': 'streak',
-                'icon': '📖',
-                'criteria': {'type': 'ai_chat_streak', 'value': 30},
-                'points': 100,
-                'iq_bonus': 10
-            },
-            
-            # Smart Spending
-            {
-                'title': 'Умный покупатель',
-                'description': 'Потратил меньше запланированного 5 раз',
-                'category': 'saving',
-                'icon': '🛒',
-                'criteria': {'type': 'under_budget_count', 'value': 5},
-                'points': 35,
-                'iq_bonus': 4
-            },
-            {
-                'title': 'Транжира-исправитель',
-                'description': 'Сократил траты на развлечения на 20%',
-                'category': 'saving',
-                'icon': '🎮➡️📚',
-                'criteria': {'type': 'entertainment_reduction', 'value': 20},
-                'points': 60,
-                'iq_bonus': 6
-            },
-            
-            # Security & Safety
-            {
-                'title': 'Защитник',
-                'description': 'Использовал модуль защиты от мошенничества',
-                'category': 'security',
-                'icon': '🛡️',
-                'criteria': {'type': 'scam_checks', 'value': 1},
-                'points': 30,
-                'iq_bonus': 3
-            },
-            {
-                'title': 'Анти-скам герой',
-                'description': 'Выявил 5 подозрительных предложений',
-                'category': 'security',
-                'icon': '🦸‍♂️',
-                'criteria': {'type': 'scams_identified', 'value': 5},
-                'points': 75,
-                'iq_bonus': 8
-            },
-            
-            # Streak Achievements
-            {
-                'title': 'Постоянство',
-                'description': 'Заходил в приложение 7 дней подряд',
-                'category': 'streak',
-                'icon': '🔥',
-                'criteria': {'type': 'login_streak', 'value': 7},
-                'points': 25,
-                'iq_bonus': 3
-            },
-            {
-                'title': 'Привычка',
-                'description': 'Заходил в приложение 30 дней подряд',
-                'category': 'streak',
-                'icon': '💪',
-                'criteria': {'type': 'login_streak', 'value': 30},
-                'points': 100,
-                'iq_bonus': 10
-            },
-            {
-                'title': 'Неукротимый',
-                'description': 'Заходил в приложение 100 дней подряд',
-                'category': 'streak',
-                'icon': '⚡',
-                'criteria': {'type': 'login_streak', 'value': 100},
-                'points': 250,
-                'iq_bonus': 25
-            },
-            
-            # Special Achievements
-            {
-                'title': 'Финансовый гений',
-                'description': 'Достиг максимального уровня Financial IQ (100)',
-                'category': 'learning',
-                'icon': '🧠💎',
-                'criteria': {'type': 'financial_iq', 'value': 100},
-                'points': 200,
-                'iq_bonus': 20
-            },
-            {
-                'title': 'Мастер финансов',
-                'description': 'Получил все основные достижения',
-                'category': 'milestone',
-                'icon': '🏅',
-                'criteria': {'type': 'all_achievements'},
-                'points': 500,
-                'iq_bonus': 50
-            }
-        ]
+        return _ACHIEVEMENT_TEMPLATES
     
     def initialize_achievements(self):
         """Initialize achievement templates in database"""
-        for template in self.achievement_templates:
-            Achievement.objects.get_or_create(
-                title=template['title'],
-                defaults={
-                    'description': template['description'],
-                    'category': template['category'],
-                    'icon': template['icon'],
-                    'criteria': template['criteria'],
-                    'points': template['points'],
-                    'iq_bonus': template['iq_bonus']
-                }
-            )
+        Achievement.objects.bulk_create(
+            [Achievement(**template) for template in _ACHIEVEMENT_TEMPLATES],
+            update_conflicts=True,
+            unique_fields=['title'],
+            update_fields=['description', 'category', 'icon', 'criteria', 'points', 'iq_bonus'],
+        )
+        # bulk_create bypasses post_save, so drop the cached list by hand
+        invalidate_active_achievements()
     
     def check_user_achievements(self, user: User) -> List[AchievementCheck]:
         """Check which achievements user has unlocked"""
         try:
             profile = user.teen_profile
             progress = user.progress
+            metrics = self._collect_user_metrics(user, profile, progress)
             
             unlocked_achievements = []
+            # order_by() drops the model's earned_at ordering so the (user, achievement)
+            # unique index answers the lookup on its own
             existing_user_achievements = set(
-                UserAchievement.objects.filter(user=user).values_list('achievement_id', flat=True)
+                UserAchievement.objects.filter(user=user).order_by().values_list('achievement_id', flat=True)
             )
             
-            for achievement in Achievement.objects.filter(is_active=True):
+            for achievement in get_active_achievements():
                 if achievement.id in existing_user_achievements:
                     continue
                 
-                check_result = self._check_single_achievement(user, achievement)
+                check_result = self._check_single_achievement_with_metrics(achievement, metrics)
                 if check_result.unlocked:
                     unlocked_achievements.append(check_result)
             
             return unlocked_achievements
             
-        except Exception as e:
-            logger.error(f"Error checking achievements for user {user.id}: {e}")
+        except (DatabaseError, ObjectDoesNotExist) as e:
+            logger.error("Error checking achievements for user %s: %s", user.id, e)
             return []
     
-    def _check_single_achievement(self, user: User, achievement: Achievement) -> AchievementCheck:
+    def _collect_user_metrics(self, user: User, profile: Optional[UserProfile] = None,
+                              progress: Optional[UserProgress] = None) -> Dict[str, Any]:
+        """Gather every counter the achievement criteria need, one query per source"""
+        if profile is None:
+            profile = user.teen_profile
+        if progress is None:
+            progress = user.progress
+        
+        goals = user.goals.aggregate(
+            created=Count('id'),
+            max_progress=Max(ExpressionWrapper(
+                F('current_amount') * 100.0 / NullIf(F('target_amount'), 0),
+                output_field=FloatField(),
+            )),
+        )
+        
+        chats = user.teen_chat_sessions.aggregate(count=Count('id'), first=Min('created_at'))
+        scams = ScamAlert.objects.filter(user=user).aggregate(
+            checks=Count('id'),
+            identified=Count('id', filter=Q(is_suspicious=True)),
+        )
+        major_categories = ['learning', 'goal', 'budgeting']
+        
+        return {
+            'registration_date': user.date_joined.isoformat(),
+            'lessons_completed': profile.lessons_completed,
+            'quizzes_passed': profile.quizzes_passed,
+            'goals_achieved': profile.goals_achieved,
+            'financial_iq': profile.financial_iq_score,
+            'goals_created': goals['created'],
+            'max_goal_progress': min(100, goals['max_progress'] or 0),
+            'ai_chats': chats['count'],
+            'first_chat_date': chats['first'].isoformat() if chats['first'] else None,
+            'scam_checks': scams['checks'],
+            'scams_identified': scams['identified'],
+            'current_streak': progress.streak_days,
+            'budget_streak': self._calculate_budget_streak(user),
+            'total_major': Achievement.objects.filter(category__in=major_categories).count(),
+            'major_achievements': UserAchievement.objects.filter(
+                user=user, achievement__category__in=major_categories
+            ).count(),
+        }
+    
+    def _check_single_achievement(self, user: User, achievement: Achievement,
+                                  metrics: Optional[Dict[str, Any]] = None) -> AchievementCheck:
         """Check if user has unlocked a specific achievement"""
-        try:
-            criteria = achievement.criteria
-            criteria_type = criteria.get('type')
-            required_value = criteria.get('value', 1)
-            
-            progress_data = {}
-            
-            if criteria_type == 'registration':
-                # Always true for registered users
-                return AchievementCheck(
-                    unlocked=True,
-                    achievement=achievement,
-                    progress={'registration_date': user.date_joined},
-                    points_awarded=achievement.points,
-                    message=f"Поздравляем! Вы получили достижение '{achievement.title}'!"
-                )
-            
-            elif criteria_type == 'lessons_completed':
-                completed = user.teen_profile.lessons_completed
-                progress_data = {'lessons_completed': completed}
-                unlocked = completed >= required_value
-                
-            elif criteria_type == 'quizzes_passed':
-                passed = user.teen_profile.quizzes_passed
-                progress_data = {'quizzes_passed': passed}
-                unlocked = passed >= required_value
-                
-            elif criteria_type == 'goals_created':
-                created = user.goals.count()
-                progress_data = {'goals_created': created}
-                unlocked = created >= required_value
-                
-            elif criteria_type == 'goals_achieved':
-                achieved = user.teen_profile.goals_achieved
-                progress_data = {'goals_achieved': achieved}
-                unlocked = achieved >= required_value
-                
-            elif criteria_type == 'goal_progress':
-                # Check if any goal has reached the progress threshold
-                max_progress = max([goal.progress_percentage() for goal in user.goals.all()], default=0)
-                progress_data = {'max_goal_progress': max_progress}
-                unlocked = max_progress >= required_value
-                
-            elif criteria_type == 'financial_iq':
-                iq_score = user.teen_profile.financial_iq_score
-                progress_data = {'financial_iq': iq_score}
-                unlocked = iq_score >= required_value
-                
-            elif criteria_type == 'ai_chats':
-                chats = user.teen_chat_sessions.count()
-                progress_data = {'ai_chats': chats}
-                unlocked = chats >= required_value
-                
-            elif criteria_type == 'first_ai_chat':
-                unlocked = user.teen_chat_sessions.exists()
-                progress_data = {'first_chat_date': user.teen_chat_sessions.first().created_at if unlocked else None}
-                
-            elif criteria_type == 'scam_checks':
-                checks = ScamAlert.objects.filter(user=user).count()
-                progress_data = {'scam_checks': checks}
-                unlocked = checks >= required_value
-                
-            elif criteria_type == 'scams_identified':
-                identified = ScamAlert.objects.filter(user=user, is_suspicious=True).count()
-                progress_data = {'scams_identified': identified}
-                unlocked = identified >= required_value
-                
-            elif criteria_type == 'login_streak':
-                streak = self._calculate_login_streak(user)
-                progress_data = {'current_streak': streak}
-                unlocked = streak >= required_value
-                
-            elif criteria_type == 'budget_streak':
-                streak = self._calculate_budget_streak(user)
-                progress_data = {'budget_streak': streak}
-                unlocked = streak >= required_value
-                
-            elif criteria_type == 'all_achievements':
-                # Check if user has all major achievements
-                major_achievements = Achievement.objects.filter(
-                    category__in=['learning', 'goal', 'budgeting']
-                ).count()
-                user_major_achievements = UserAchievement.objects.filter(
-                    user=user,
-                    achievement__category__in=['learning', 'goal', 'budgeting']
-                ).count()
-                progress_data = {
-                    'major_achievements': user_major_achievements,
-                    'total_major': major_achievements
-                }
-                unlocked = user_major_achievements >= major_achievements * 0.8  # 80% threshold
-                
-            else:
-                unlocked = False
-            
-            if unlocked:
-                return AchievementCheck(
-                    unlocked=True,
-                    achievement=achievement,
-                    progress=progress_data,
-                    points_awarded=achievement.points,
-                    message=f"Поздравляем! Вы получили достижение '{achievement.title}'!"
-                )
-            else:
-                return AchievementCheck(
-                    unlocked=False,
-                    achievement=achievement,
-                    progress=progress_data,
-                    points_awarded=0,
-                    message=""
-                )
-                
-        except Exception as e:
-            logger.error(f"Error checking achievement {achievement.title}: {e}")
+        if metrics is None:
+            try:
+                metrics = self._collect_user_metrics(user)
+            except (DatabaseError, ObjectDoesNotExist) as e:
+                logger.error("Error checking achievement %s: %s", achievement.title, e)
+                metrics = {}
+        return self._check_single_achievement_with_metrics(achievement, metrics)
+    
+    def _check_single_achievement_with_metrics(self, achievement: Achievement,
+                                               metrics: Dict[str, Any]) -> AchievementCheck:
+        """Evaluate an achievement against precomputed metrics, without touching the database"""
+        criteria = achievement.criteria
+        handler = _CRITERIA_HANDLERS.get(criteria.get('type'))
+        unlocked, progress_data = False, {}
+        
+        if handler is not None:
+            try:
+                unlocked, progress_data = handler(metrics, criteria.get('value', 1))
+            except (KeyError, TypeError) as e:
+                logger.error("Error checking achievement %s: %s", achievement.title, e)
+        
+        if unlocked:
+            return AchievementCheck(
+                unlocked=True,
+                achievement=achievement,
+                progress=progress_data,
+                points_awarded=achievement.points,
+                message=f"Поздравляем! Вы получили достижение '{achievement.title}'!"
+            )
+        else:
             return AchievementCheck(
                 unlocked=False,
                 achievement=achievement,
-                progress={},
+                progress=progress_data,
                 points_awarded=0,
                 message=""
             )
     
     def unlock_achievements(self, user: User, achievements: List[AchievementCheck]) -> Dict[str, Any]:
         """Unlock achievements for user and update their profile"""
+        unlocked_checks = [check for check in achievements if check.unlocked]
+        newly_unlocked = []
+        total_points = 0
+        total_iq_bonus = 0
+        
+        for achievement_check in unlocked_checks:
+            newly_unlocked.append({
+                'title': achievement_check.achievement.title,
+                'description': achievement_check.achievement.description,
+                'icon': achievement_check.achievement.icon,
+                'category': achievement_check.achievement.category,
+                'points': achievement_check.points_awarded,
+                'iq_bonus': achievement_check.achievement.iq_bonus,
+                'message': achievement_check.message
+            })
+            
+            total_points += achievement_check.points_awarded
+            total_iq_bonus += achievement_check.achievement.iq_bonus
+        
         try:
-            newly_unlocked = []
-            total_points = 0
-            total_iq_bonus = 0
+            profile = user.teen_profile
             
-            for achievement_check in achievements:
-                if achievement_check.unlocked:
-                    # Create user achievement record
-                    UserAchievement.objects.create(
+            with transaction.atomic():
+                # Create user achievement records
+                UserAchievement.objects.bulk_create([
+                    UserAchievement(
                         user=user,
                         achievement=achievement_check.achievement,
                         progress=achievement_check.progress,
                         is_completed=True
                     )
-                    
-                    newly_unlocked.append({
-                        'title': achievement_check.achievement.title,
-                        'description': achievement_check.achievement.description,
-                        'icon': achievement_check.achievement.icon,
-                        'category': achievement_check.achievement.category,
-                        'points': achievement_check.points_awarded,
-                        'iq_bonus': achievement_check.achievement.iq_bonus,
-                        'message': achievement_check.message
-                    })
-                    
-                    total_points += achievement_check.points_awarded
-                    total_iq_bonus += achievement_check.achievement.iq_bonus
-            
-            if total_points > 0:
-                # Update user profile
-                profile = user.teen_profile
-                profile.total_achievements += len(newly_unlocked)
-                profile.financial_iq_score = min(100, profile.financial_iq_score + total_iq_bonus)
-                profile.save()
+                    for achievement_check in unlocked_checks
+                ])
                 
-                # Update progress
-                progress = user.progress
-                progress.total_achievements = profile.total_achievements
-                progress.save()
-            
-            return {
-                'unlocked_count': len(newly_unlocked),
-                'total_points': total_points,
-                'total_iq_bonus': total_iq_bonus,
-                'new_iq_score': user.teen_profile.financial_iq_score,
-                'achievements': newly_unlocked
-            }
+                if total_points > 0:
+                    # Update user profile
+                    profile.total_achievements += len(newly_unlocked)
+                    profile.financial_iq_score = min(100, profile.financial_iq_score + total_iq_bonus)
+                    profile.save(update_fields=['total_achievements', 'financial_iq_score', 'updated_at'])
+                    
+                    # UserProgress has no achievement counter; saving only refreshes last_activity
+                    user.progress.save(update_fields=['last_activity'])
             
-        except Exception as e:
-            logger.error(f"Error unlocking achievements for user {user.id}: {e}")
+        except (DatabaseError, ObjectDoesNotExist) as e:
+            logger.error("Error unlocking achievements for user %s: %s", user.id, e)
             return {'unlocked_count': 0, 'achievements': [], 'error': str(e)}
+        
+        return {
+            'unlocked_count': len(newly_unlocked),
+            'total_points': total_points,
+            'total_iq_bonus': total_iq_bonus,
+            'new_iq_score': profile.financial_iq_score,
+            'achievements': newly_unlocked
+        }
     
-    def _calculate_login_streak(self, user: User) -> int:
-        """Calculate current login streak for user"""
-        try:
-            # Get user's last activity
-            progress = user.progress
-            if not progress.last_activity:
-                return 0
-            
-            last_activity = progress.last_activity.date()
-            today = timezone.now().date()
-            
-            # Calculate days difference
-            days_diff = (today - last_activity).days
-            
-            # If more than 1 day gap, streak is broken
-            if days_diff > 1:
+    def _calculate_login_streak(self, user: User, progress: Optional[UserProgress] = None) -> int:
+        """Reconcile the stored login streak with the gap since the last activity"""
+        # Get user's last activity
+        if progress is None:
+            try:
+                progress = user.progress
+            except ObjectDoesNotExist as e:
+                logger.error("Error calculating login streak: %s", e)
                 return 0
-            
-            # If last activity was yesterday, continue streak
-            if days_diff == 1:
-                return progress.streak_days + 1
-            
-            # If last activity was today, keep current streak
-            return progress.streak_days
-            
-        except Exception as e:
-            logger.error(f"Error calculating login streak: {e}")
+        if not progress.last_activity:
             return 0
+        
+        last_activity = progress.last_activity.date()
+        today = timezone.now().date()
+        
+        # Calculate days difference
+        days_diff = (today - last_activity).days
+        
+        # If more than 1 day gap, streak is broken
+        if days_diff > 1:
+            return 0
+        
+        # If last activity was yesterday, continue streak
+        if days_diff == 1:
+            return progress.streak_days + 1
+        
+        # If last activity was today, keep current streak
+        return progress.streak_days
     
     def _calculate_budget_streak(self, user: User) -> int:
         """Calculate streak of consecutive days with budget updates"""
         try:
             # This would require tracking daily budget updates
             # For now, return a simplified version
-            recent_expenses = user.teen_expenses.filter(
+            recent_expense_days = user.teen_expenses.filter(
                 date__gte=timezone.now().date() - timedelta(days=30)
-            ).values('date').distinct().count()
+            ).aggregate(days=Count('date', distinct=True))['days']
             
-            return min(recent_expenses, 30)  # Max 30 days
+            return min(recent_expense_days, 30)  # Max 30 days
             
-        except Exception as e:
-            logger.error(f"Error calculating budget streak: {e}")
+        except DatabaseError as e:
+            logger.error("Error calculating budget streak: %s", e)
             return 0
     
     def update_user_activity(self, user: User):
         """Update user activity and check for streak achievements"""
         try:
             progress = user.progress
-            today = timezone.now().date()
-            last_activity = progress.last_activity.date() if progress.last_activity else None
-            
-            if last_activity:
-                days_diff = (today - last_activity).days
-                
-                if days_diff == 1:
-                    # Continue streak
-                    progress.streak_days += 1
-                    progress.current_streak += 1
-                elif days_diff == 0:
-                    # Same day, don't change streak
-                    pass
-                else:
-                    # Streak broken
-                    progress.streak_days = 1
-                    progress.current_streak = 1
-            else:
-                # First activity
-                progress.streak_days = 1
-                progress.current_streak = 1
+            # A broken streak or a first visit restarts at one day
+            progress.streak_days = max(1, self._calculate_login_streak(user, progress))
             
             progress.last_activity = timezone.now()
-            progress.save()
             
             # Update profile streak
             profile = user.teen_profile
-            profile.current_streak = progress.current_streak
-            if progress.current_streak > profile.longest_streak:
-                profile.longest_streak = progress.current_streak
-            profile.save()
+            profile.current_streak = progress.streak_days
+            if progress.streak_days > profile.longest_streak:
+                profile.longest_streak = progress.streak_days
             
-        except Exception as e:
-            logger.error(f"Error updating user activity: {e}")
+            with transaction.atomic():
+                progress.save(update_fields=['streak_days', 'last_activity'])
+                profile.save(update_fields=['current_streak', 'longest_streak', 'updated_at'])
+            
+        except (DatabaseError, ObjectDoesNotExist) as e:
+            logger.error("Error updating user activity: %s", e)
     
     def get_user_dashboard_data(self, user: User) -> Dict[str, Any]:
         """Get gamification data for user dashboard"""
+        key = dashboard_cache_key(user.id)
+        data = cache.get(key)
+        if data is None:
+            data = self._build_user_dashboard_data(user)
+            if data:
+                cache.set(key, data, DASHBOARD_CACHE_SECONDS)
+        return data
+    
+    def _build_user_dashboard_data(self, user: User) -> Dict[str, Any]:
+        """Compute the dashboard payload from the database"""
         try:
             profile = user.teen_profile
             progress = user.progress
             
             # Get user achievements
-            user_achievements = UserAchievement.objects.filter(user=user).select_related('achievement')
-            
-            achievements_by_category = {}
-            total_points = 0
-            
-            for user_achievement in user_achievements:
-                category = user_achievement.achievement.category
-                if category not in achievements_by_category:
-                    achievements_by_category[category] = []
-                
-                achievements_by_category[category].append({
-                    'title': user_achievement.achievement.title,
-                    'description': user_achievement.achievement.description,
-                    'icon': user_achievement.achievement.icon,
-                    'earned_at': user_achievement.earned_at,
-                    'points': user_achievement.achievement.points
+            earned = UserAchievement.objects.filter(user=user)
+            total_points = earned.aggregate(total=Sum('achievement__points'))['total'] or 0
+            user_achievements = earned.values(
+                'achievement_id', 'earned_at', 'achievement__title', 'achievement__description',
+                'achievement__icon', 'achievement__category', 'achievement__points',
+            ).iterator(chunk_size=50)
+            
+            achievements_by_category = defaultdict(list)
+            earned_achievement_ids = set()
+            
+            for row in user_achievements:
+                achievements_by_category[row['achievement__category']].append({
+                    'title': row['achievement__title'],
+                    'description': row['achievement__description'],
+                    'icon': row['achievement__icon'],
+                    'earned_at': row['earned_at'],
+                    'points': row['achievement__points']
                 })
-                
-                total_points += user_achievement.achievement.points
+                earned_achievement_ids.add(row['achievement_id'])
             
             # Get available achievements (not yet earned)
-            earned_achievement_ids = set(user_achievements.values_list('achievement_id', flat=True))
-            available_achievements = Achievement.objects.filter(
-                is_active=True
-            ).exclude(
-                id__in=earned_achievement_ids
-            )[:5]  # Show top 5 available
+            available_achievements = [
+                achievement for achievement in get_active_achievements()
+                if achievement.id not in earned_achievement_ids
+            ][:5]  # Show top 5 available
             
+            metrics = self._collect_user_metrics(user, profile, progress)
             next_achievements = []
             for achievement in available_achievements:
-                check_result = self._check_single_achievement(user, achievement)
+                check_result = self._check_single_achievement_with_metrics(achievement, metrics)
                 progress_percent = self._calculate_achievement_progress(check_result.progress, achievement.criteria)
                 
                 next_achievements.append({
@@ -642,71 +682,44 @@ class GamificationEngine:
                 'current_streak': profile.current_streak,
                 'longest_streak': profile.longest_streak,
                 'total_points': total_points,
-                'earned_achievements': achievements_by_category,
+                'earned_achievements': dict(achievements_by_category),
                 'next_achievements': next_achievements,
                 'level': self._calculate_user_level(total_points),
                 'progress_to_next_level': self._calculate_progress_to_next_level(total_points)
             }
             
-        except Exception as e:
-            logger.error(f"Error getting user dashboard data: {e}")
+        except (DatabaseError, ObjectDoesNotExist) as e:
+            logger.error("Error getting user dashboard data: %s", e)
             return {}
     
     def _calculate_achievement_progress(self, progress_data: Dict, criteria: Dict) -> int:
         """Calculate progress percentage toward achievement"""
+        key = _COUNTER_CRITERIA.get(criteria.get('type'))
+        if key is None:
+            return 0
+        
+        current = progress_data.get(key, 0)
+        required_value = criteria.get('value', 1)
+        
         try:
-            criteria_type = criteria.get('type')
-            required_value = criteria.get('value', 1)
-            
-            if criteria_type == 'lessons_completed':
-                current = progress_data.get('lessons_completed', 0)
-            elif criteria_type == 'quizzes_passed':
-                current = progress_data.get('quizzes_passed', 0)
-            elif criteria_type == 'goals_created':
-                current = progress_data.get('goals_created', 0)
-            elif criteria_type == 'goals_achieved':
-                current = progress_data.get('goals_achieved', 0)
-            elif criteria_type == 'goal_progress':
-                current = progress_data.get('max_goal_progress', 0)
-            elif criteria_type == 'financial_iq':
-                current = progress_data.get('financial_iq', 0)
-            elif criteria_type == 'ai_chats':
-                current = progress_data.get('ai_chats', 0)
-            elif criteria_type == 'scam_checks':
-                current = progress_data.get('scam_checks', 0)
-            elif criteria_type == 'scams_identified':
-                current = progress_data.get('scams_identified', 0)
-            elif criteria_type == 'login_streak':
-                current = progress_data.get('current_streak', 0)
-            elif criteria_type == 'budget_streak':
-                current = progress_data.get('budget_streak', 0)
-            else:
-                return 0
-            
             return min(100, int((current / required_value) * 100))
-            
-        except Exception as e:
-            logger.error(f"Error calculating achievement progress: {e}")
+        except (TypeError, ZeroDivisionError) as e:
+            logger.error("Error calculating achievement progress: %s", e)
             return 0
     
     def _calculate_user_level(self, total_points: int) -> int:
         """Calculate user level based on total points"""
-        # Level calculation: Every 100 points = 1 level
-        return max(1, (total_points // 100) + 1)
+        # Level calculation: Every POINTS_PER_LEVEL points = 1 level
+        return max(1, (total_points // POINTS_PER_LEVEL) + 1)
     
     def _calculate_progress_to_next_level(self, total_points: int) -> Dict[str, int]:
         """Calculate progress to next level"""
-        current_level = self._calculate_user_level(total_points)
-        current_level_points = (current_level - 1) * 100
-        next_level_points = current_level * 100
-        
-        progress_points = total_points - current_level_points
-        needed_points = next_level_points - current_level_points
+        progress_points = total_points % POINTS_PER_LEVEL
         
         return {
             'current': progress_points,
-            'needed': needed_points,
-            'percentage': int((progress_points / needed_points) * 100) if needed_points > 0 else 100
+            'needed': POINTS_PER_LEVEL,
+            'percentage': progress_points * 100 // POINTS_PER_LEVEL
         }
 
 
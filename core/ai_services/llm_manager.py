@@ -113,7 +113,9 @@ class LLMManager:
                    **kwargs) -> LLMResponse:
         """Async chat with current LLM provider"""
         if self.current_provider in self.providers:
-            return await self.providers[self.current_provider](
+            # Provider calls are blocking HTTP; keep them off the event loop
+            return await asyncio.to_thread(
+                self.providers[self.current_provider],
                 messages, temperature, max_tokens, **kwargs
             )
         else:
@@ -3,117 +3,172 @@ Teen Financial Coach AI Service
 Provides age-appropriate financial guidance and education for teens
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import re
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from dataclasses import replace
+from functools import lru_cache
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Q, Sum, Count
+from django.core.cache import cache
+from django.db.models import (
+    Count, DateField, DurationField, ExpressionWrapper, F, FloatField, Prefetch, Q, Sum, Value,
+)
+from django.db.models.functions import Cast, Coalesce, Least, NullIf
+from django.utils import timezone
+from .gamification import get_active_achievements, invalidate_user_dashboard
 from .llm_manager import llm_manager, LLMResponse
 from ..models import (
     UserGoal, Income, Expense, UserProfile, 
     TeenChatSession, TeenChatMessage, LearningModule,
-    Achievement, UserAchievement
+    UserAchievement
 )
 
 logger = logging.getLogger(__name__)
 
+_NON_WORD_RE = re.compile(r'[\W_]+')
 
-class TeenFinancialCoach:
-    """
-    AI-powered financial coach specifically designed for teenagers
-    Provides personalized guidance on budgeting, saving, and financial literacy
-    """
-    
-    def __init__(self):
-        self.llm = llm_manager
-        
-    async def get_coaching_response(self, 
-                                  user: User,
-                                  message: str,
-                                  context: Dict = None) -> Dict[str, Any]:
-        """
-        Main coaching method - processes user message and returns AI response
-        """
+# Amounts in the system prompt are rounded to this step (teen amounts are small,
+# so a coarser step would flatten them to zero)
+_PROMPT_AMOUNT_BUCKET = 100
+
+# Amount totals come back from the DB as floats, ready for the prompt and JSON
+_FLOAT_TOTAL = Coalesce(Sum('amount'), 0.0, output_field=FloatField())
+
+# AI insights for an unchanged spending breakdown are reused for this long
+SPENDING_INSIGHTS_CACHE_SECONDS = 60 * 60
+
+# Columns _build_user_context actually reads
+_CONTEXT_PROFILE_FIELDS = (
+    'age', 'monthly_allowance', 'currency', 'preferred_language', 'financial_iq_score',
+    'lessons_completed', 'quizzes_passed', 'total_achievements',
+)
+
+# Recent coach chat turns kept hot in the cache in front of the DB
+HISTORY_LENGTH = 6
+HISTORY_CACHE_SECONDS = 60 * 60 * 24
+
+
+# Per-user part of the coaching system prompt, per language
+_COACHING_PROMPT_SUFFIX = {
+    'ru': """
+ТЕКУЩАЯ СИТУАЦИЯ ПОЛЬЗОВАТЕЛЯ:
+- Возраст: {age} лет (говори языком, понятным {age}-летнему школьнику)
+- Месячная сумма на расходы: около {allowance} сом
+- Активные цели: {active_goals}
+- Недавние доходы: около {recent_income} сом
+- Недавние расходы: около {recent_expenses} сом
+""",
+    'en': """
+USER'S CURRENT SITUATION:
+- Age: {age} years (speak so a {age}-year-old student can understand)
+- Monthly allowance: about {allowance} KGS
+- Active goals: {active_goals}
+- Recent income: about {recent_income} KGS
+- Recent expenses: about {recent_expenses} KGS
+""",
+}
+
+# Appended to the coaching system prompt so advice, reasoning and topic come back
+# in one completion instead of a second "why" request; same language keys as
+# _COACHING_PROMPT_SUFFIX
+_COACHING_REPLY_FORMAT = {
+    'ru': """
+ФОРМАТ ОТВЕТА:
+Ответь JSON-объектом без пояснений вокруг:
+{"advice": "твой ответ подростку", "reasoning": "1-2 предложения, почему ты дал такой совет", "objective": "тема обучения или null"}
+""",
+    'en': """
+REPLY FORMAT:
+Reply with a JSON object and nothing around it:
+{"advice": "your reply to the teenager", "reasoning": "1-2 sentences on why you gave this advice", "objective": "learning topic or null"}
+""",
+}
+
+_DEFAULT_REASONING = "Совет основан на твоей текущей финансовой ситуации и целях."
+
+
+def _parse_coaching_reply(content: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """Split a JSON coaching reply into (advice, reasoning, objective), tolerating plain text"""
+    start, end = content.find('{'), content.rfind('}')
+    if start != -1 and end > start:
         try:
-            # Get user profile and context
-            profile = user.teen_profile
-            user_context = await self._build_user_context(user)
-            
-            # Build conversation history
-            conversation_history = await self._get_conversation_history(user)
-            
-            # Create system prompt for teen coaching
-            system_prompt = self._create_coaching_system_prompt(profile, user_context)
-            
-            # Prepare messages for LLM
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add recent conversation history
-            messages.extend(conversation_history[-6:])  # Last 3 exchanges
-            
-            # Add current user message
-            messages.append({"role": "user", "content": message})
-            
-            # Get AI response
-            response = await self.llm.chat(messages, temperature=0.7, max_tokens=800)
-            
-            # Analyze response for educational content
-            educational_analysis = await self._analyze_educational_content(response.content, message)
-            
-            # Save interaction to database
-            chat_session = await self._save_chat_interaction(
-                user, message, response, educational_analysis
-            )
-            
-            # Check for achievements
-            await self._check_coaching_achievements(user, message, response.content)
-            
-            return {
-                'response': response.content,
-                'session_id': chat_session.session_id,
-                'confidence': response.confidence,
-                'educational_content': educational_analysis.get('contains_educational', False),
-                'learning_objective': educational_analysis.get('objective'),
-                'reasoning_explained': educational_analysis.get('reasoning'),
-                'was_actionable': educational_analysis.get('actionable', False),
-                'ai_reasoning': await self._generate_reasoning(response.content, user_context)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error in teen coaching: {e}")
-            return {
-                'response': "Извините, произошла техническая ошибка. Попробуйте позже.",
-                'error': str(e)
-            }
-    
-    def _create_coaching_system_prompt(self, profile: UserProfile, user_context: Dict) -> str:
-        """Create system prompt tailored to specific teen user"""
-        
-        age = profile.age or 16  # Default to 16 if not set
-        language = profile.preferred_language
-        
-        base_prompt = {
-            'ru': f"""
-Ты - персональный финансовый коуч для подростка {age} лет из Кыргызстана.
+            data = json.loads(content[start:end + 1])
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and data.get('advice'):
+            return str(data['advice']), data.get('reasoning') or None, data.get('objective') or None
+    return content, None, None
+
+
+def _indicator_alternation(indicators: List[str]) -> str:
+    """Join substring indicators into one regex alternation, longest first"""
+    return '|'.join(map(re.escape, sorted(indicators, key=len, reverse=True)))
+
+
+def _compile_words(words: List[str]) -> re.Pattern:
+    """Match any of the words/phrases as whole words, case-insensitively"""
+    alternation = _indicator_alternation(words).replace('\\ ', r'\s+')
+    return re.compile(rf'\b(?:{alternation})\b', re.IGNORECASE)
+
+
+# Whole-word matching, so inflected forms are listed explicitly
+_GOAL_WORDS = ['цель', 'цели', 'целью', 'целей', 'накопить на']
+_BUDGET_WORDS = ['бюджет', 'бюджета', 'бюджете', 'бюджетом', 'планировать']
+
+
+_EDUCATIONAL_INDICATORS = [
+    'важно понимать', 'запомни', 'правило', 'совет', 'объясняю',
+    'почему это важно', 'пример', 'подумай о том',
+    'чтобы научиться', 'навык', 'умение'
+]
+
+_ACTIONABLE_INDICATORS = [
+    'попробуй', 'начни с', 'сделай', 'поставь цель', 'считай',
+    'запиши', 'план', 'шаг', 'действие', 'измени'
+]
+
+# Both lists in a single pass over the reply; the named group tells them apart
+_INDICATORS_RE = re.compile(
+    f"(?P<educational>{_indicator_alternation(_EDUCATIONAL_INDICATORS)})"
+    f"|(?P<actionable>{_indicator_alternation(_ACTIONABLE_INDICATORS)})"
+)
+
+# Checked in order; the first matching topic wins
+_OBJECTIVE_PATTERNS = [
+    (_compile_words(['как']), "Основы экономии и накоплений"),
+    (_compile_words(_BUDGET_WORDS), "Планирование бюджета"),
+    (_compile_words(_GOAL_WORDS), "Постановка и достижение финансовых целей"),
+]
+
+# Achievements granted straight from the coach chat, with the message words
+# that trigger them (None means any conversation counts)
+_COACHING_ACHIEVEMENTS = (
+    ("Первый разговор", None),
+    ("Целеустремленный", _compile_words(_GOAL_WORDS + ['хочу купить'])),
+    ("Планировщик бюджета", _compile_words(_BUDGET_WORDS + ['тратить'])),
+)
+
+# User-independent part of the coaching system prompt, per language
+_COACHING_PROMPT_PREFIX = {
+    'ru': """
+Ты - персональный финансовый коуч для подростка из Кыргызстана.
 Твоя цель - помочь подростку научиться управлять деньгами и достигать финансовых целей.
 
 ПРИНЦИПЫ РАБОТЫ:
-- Говори простым языком, понятным {age}-летнему школьнику
+- Говори простым языком, понятным школьнику его возраста
 - Всегда объясняй "почему" свои советы
 - Используй примеры из жизни подростков в Кыргызстане
 - Будь позитивным и мотивирующим
 - Предлагай конкретные действия
 - Помогай ставить реалистичные цели
 
-ТЕКУЩАЯ СИТУАЦИЯ ПОЛЬЗОВАТЕЛЯ:
-- Возраст: {age} лет
-- Месячная сумма на расходы: {user_context.get('monthly_allowance', 0)} сом
-- Активные цели: {user_context.get('active_goals', 0)}
-- Недавние доходы: {user_context.get('recent_income', 0)} сом
-- Недавние расходы: {user_context.get('recent_expenses', 0)} сом
-
 ОБЛАСТИ ПОМОЩИ:
 1. Планирование бюджета (карманные деньги, подработка)
 2. Накопления на цели (телефон, ноутбук, курсы)
@@ -133,25 +188,18 @@ class TeenFinancialCoach:
 - Дай практические советы
 - Объясни, как это поможет достичь цели
 """,
-            'en': f"""
-You are a personal financial coach for a {age}-year-old teenager from Kyrgyzstan.
+    'en': """
+You are a personal financial coach for a teenager from Kyrgyzstan.
 Your goal is to help the teenager learn to manage money and achieve financial goals.
 
 WORKING PRINCIPLES:
-- Speak in simple language that a {age}-year-old student can understand
+- Speak in simple language that a student of their age can understand
 - Always explain "why" your advice
 - Use examples from teen life in Kyrgyzstan
 - Be positive and motivating
 - Offer concrete actions
 - Help set realistic goals
 
-USER'S CURRENT SITUATION:
-- Age: {age} years
-- Monthly allowance: {user_context.get('monthly_allowance', 0)} KGS
-- Active goals: {user_context.get('active_goals', 0)}
-- Recent income: {user_context.get('recent_income', 0)} KGS
-- Recent expenses: {user_context.get('recent_expenses', 0)} KGS
-
 AREAS OF HELP:
 1. Budget planning (allowance, part-time work)
 2. Saving for goals (phone, laptop, courses)
@@ -170,15 +218,219 @@ BE SPECIFIC:
 - Offer amounts in KGS
 - Give practical advice
 - Explain how this will help achieve the goal
-"""
-        }
+""",
+}
+
+
+def _coaching_reply_format(user_context: Dict) -> str:
+    """JSON reply instruction in the same language as the rendered coaching prompt"""
+    language = user_context.get('preferred_language', 'ru')
+    return _COACHING_REPLY_FORMAT.get(language, _COACHING_REPLY_FORMAT['ru'])
+
+
+def _amount_bucket(amount) -> int:
+    """Round a KGS amount to the nearest _PROMPT_AMOUNT_BUCKET so rendered prompts repeat"""
+    return int(round(float(amount or 0) / _PROMPT_AMOUNT_BUCKET)) * _PROMPT_AMOUNT_BUCKET
+
+
+@lru_cache(maxsize=4096)
+def _render_coaching_prompt(language: str, age: int, allowance: int, active_goals: int,
+                            recent_income: int, recent_expenses: int) -> str:
+    """Render the coaching system prompt; amounts arrive pre-bucketed so renders are reused"""
+    if language not in _COACHING_PROMPT_SUFFIX:
+        language = 'ru'
+    
+    # Static rules go first so every request shares the same prompt prefix
+    # and the provider's prefix cache can skip re-processing it
+    return _COACHING_PROMPT_PREFIX[language] + _COACHING_PROMPT_SUFFIX[language].format(
+        age=age,
+        allowance=allowance,
+        active_goals=active_goals,
+        recent_income=recent_income,
+        recent_expenses=recent_expenses,
+    )
+
+
+async def _alist(queryset) -> list:
+    """Evaluate a queryset through the async ORM"""
+    return [obj async for obj in queryset]
+
+
+def _primary_goal(active_goals):
+    """Goal fields for the coach context, with progress and time left computed in the DB
+    (same rules as UserGoal.progress_percentage/days_remaining for active goals)"""
+    target = Cast('target_amount', FloatField())
+    return active_goals.values('title').annotate(
+        target=target,
+        current=Cast('current_amount', FloatField()),
+        progress=Coalesce(
+            Least(Cast('current_amount', FloatField()) * 100 / NullIf(target, 0.0), Value(100.0)),
+            0.0,
+        ),
+        time_left=ExpressionWrapper(
+            F('target_date') - Value(timezone.now().date(), output_field=DateField()),
+            output_field=DurationField(),
+        ),
+    )
+
+
+def _spending_by_category(expenses):
+    """Per-type expense totals and counts, largest first"""
+    return expenses.values('expense_type').annotate(
+        total=Sum('amount', output_field=FloatField()),
+        count=Count('id')
+    ).order_by('-total')
+
+
+def history_cache_key(user_id: int) -> str:
+    return f"teen:hist:{user_id}"
+
+
+def invalidate_conversation_history(user_id: int):
+    cache.delete(history_cache_key(user_id))
+
+
+class TeenFinancialCoach:
+    """
+    AI-powered financial coach specifically designed for teenagers
+    Provides personalized guidance on budgeting, saving, and financial literacy
+    """
+    
+    def __init__(self):
+        self.llm = llm_manager
         
-        return base_prompt.get(language, base_prompt['ru'])
+    async def get_coaching_response(self, 
+                                  user: User,
+                                  message: str,
+                                  context: Dict = None,
+                                  verbose_reasoning: bool = False) -> Dict[str, Any]:
+        """
+        Main coaching method - processes user message and returns AI response.
+        The reasoning comes back in the same completion; verbose_reasoning=True
+        additionally asks the model for a separate explanation (one more LLM call).
+        """
+        try:
+            # User context (profile included) and history are independent reads
+            user_context, conversation_history = await asyncio.gather(
+                self._build_user_context(user),
+                self._get_conversation_history(user),
+            )
+            
+            # Create system prompt for teen coaching
+            system_prompt = self._create_coaching_system_prompt(user_context)
+            
+            # Prepare messages for LLM
+            messages = [{"role": "system", "content": system_prompt + _coaching_reply_format(user_context)}]
+            
+            # Add recent conversation history
+            messages.extend(conversation_history[-6:])  # Last 3 exchanges
+            
+            # Add current user message
+            messages.append({"role": "user", "content": message})
+            
+            # Get AI response, reusing a cached reply to the same question from a similar
+            # user. Only opening questions are shared: a follow-up ("а почему?") is
+            # answered from this user's own conversation, so it never hits the cache
+            cache_key = None if conversation_history else self._response_cache_key(message, system_prompt)
+            response = await self._cached_response(cache_key)
+            if response is None:
+                response = await self.llm.chat(messages, temperature=0.7, max_tokens=800)
+                await self._cache_response(cache_key, response)
+            
+            advice, reasoning, objective = _parse_coaching_reply(response.content)
+            response = replace(response, content=advice)
+            
+            # Analyze response for educational content
+            educational_analysis = await self._analyze_educational_content(response.content, message)
+            educational_analysis['objective'] = educational_analysis['objective'] or objective
+            educational_analysis['reasoning'] = reasoning or ''
+            
+            # Save interaction, check achievements and (if asked) explain the
+            # advice concurrently; none of them depends on another
+            stages = [
+                self._save_chat_interaction(user, message, response, educational_analysis),
+                self._check_coaching_achievements(user, message, response.content),
+            ]
+            if verbose_reasoning:
+                stages.append(self._generate_reasoning(response.content, user_context))
+            chat_session, _, *explanation = await asyncio.gather(*stages)
+            
+            return {
+                'response': response.content,
+                'session_id': chat_session.session_id,
+                'confidence': response.confidence,
+                'educational_content': educational_analysis.get('contains_educational', False),
+                'learning_objective': educational_analysis.get('objective'),
+                'reasoning_explained': educational_analysis.get('reasoning'),
+                'was_actionable': educational_analysis.get('actionable', False),
+                'ai_reasoning': explanation[0] if explanation else reasoning or _DEFAULT_REASONING
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in teen coaching: {e}")
+            return {
+                'response': "Извините, произошла техническая ошибка. Попробуйте позже.",
+                'error': str(e)
+            }
+    
+    def _response_cache_key(self, message: str, system_prompt: str) -> str:
+        """
+        Key a reply by the normalized question and the rendered system prompt.
+        The prompt carries everything about the user the model sees (age, language,
+        bucketed allowance/income/expenses, active goals), so only users who would
+        send the model the same request share a reply.
+        """
+        normalized = ' '.join(_NON_WORD_RE.sub(' ', message.lower()).split())
+        digest = hashlib.sha256(f"{system_prompt}\x00{normalized}".encode('utf-8')).hexdigest()
+        return f"teen_coach:reply:{digest}"
+    
+    async def _cached_response(self, key: Optional[str]) -> Optional[LLMResponse]:
+        if key is None or settings.TEEN_COACH_CACHE_SECONDS <= 0:
+            return None
+        cached = await cache.aget(key)
+        if cached is None:
+            return None
+        return LLMResponse(**cached, metadata={'cached': True})
+    
+    async def _cache_response(self, key: Optional[str], response: LLMResponse):
+        # Provider error fallbacks come back without metadata; an outage must not be replayed
+        if key is None or settings.TEEN_COACH_CACHE_SECONDS <= 0 or response.metadata is None:
+            return
+        await cache.aset(key, {
+            'content': response.content,
+            'provider': response.provider,
+            'model': response.model,
+            'confidence': response.confidence,
+        }, settings.TEEN_COACH_CACHE_SECONDS)
+    
+    def _create_coaching_system_prompt(self, user_context: Dict) -> str:
+        """Create system prompt tailored to specific teen user"""
+        return _render_coaching_prompt(
+            user_context.get('preferred_language', 'ru'),
+            user_context.get('age', 16),
+            _amount_bucket(user_context.get('monthly_allowance', 0)),
+            user_context.get('active_goals', 0),
+            _amount_bucket(user_context.get('recent_income', 0)),
+            _amount_bucket(user_context.get('recent_expenses', 0)),
+        )
     
     async def _build_user_context(self, user: User) -> Dict[str, Any]:
         """Build comprehensive user context for AI coaching"""
         try:
-            profile = user.teen_profile
+            # Recent financial activity (last 30 days)
+            thirty_days_ago = datetime.now().date() - timedelta(days=30)
+            active_goals = user.goals.filter(status='active')
+            recent_expenses_qs = user.teen_expenses.filter(date__gte=thirty_days_ago)
+            
+            # Independent queries, awaited together; the per-category expense
+            # rows (a handful of types) also give the expense total
+            profile, active_goal_count, goal, income, spending_categories = await asyncio.gather(
+                UserProfile.objects.only(*_CONTEXT_PROFILE_FIELDS).aget(user=user),
+                active_goals.acount(),
+                _primary_goal(active_goals).afirst(),
+                user.teen_incomes.filter(date__gte=thirty_days_ago).aaggregate(total=_FLOAT_TOTAL),
+                _alist(_spending_by_category(recent_expenses_qs)),
+            )
             
             # Basic info
             context = {
@@ -190,44 +442,24 @@ BE SPECIFIC:
             }
             
             # Goals context
-            active_goals = user.goals.filter(status='active')
-            context['active_goals'] = active_goals.count()
-            if active_goals.exists():
-                goal = active_goals.first()
+            context['active_goals'] = active_goal_count
+            if goal is not None:
                 context['primary_goal'] = {
-                    'title': goal.title,
-                    'target_amount': float(goal.target_amount),
-                    'current_amount': float(goal.current_amount),
-                    'progress': goal.progress_percentage(),
-                    'days_remaining': goal.days_remaining()
+                    'title': goal['title'],
+                    'target_amount': goal['target'],
+                    'current_amount': goal['current'],
+                    'progress': goal['progress'],
+                    'days_remaining': max(0, goal['time_left'].days)
                 }
             
-            # Recent financial activity (last 30 days)
-            thirty_days_ago = datetime.now().date() - timedelta(days=30)
-            recent_income = user.teen_incomes.filter(date__gte=thirty_days_ago).aggregate(
-                total=Sum('amount')
-            )['total'] or 0
-            
-            recent_expenses = user.teen_expenses.filter(date__gte=thirty_days_ago).aggregate(
-                total=Sum('amount')
-            )['total'] or 0
-            
-            context['recent_income'] = float(recent_income)
-            context['recent_expenses'] = float(recent_expenses)
+            context['recent_income'] = income['total']
+            context['recent_expenses'] = sum((cat['total'] for cat in spending_categories), 0.0)
             context['net_flow'] = context['recent_income'] - context['recent_expenses']
             
-            # Spending categories
-            spending_categories = user.teen_expenses.filter(date__gte=thirty_days_ago).values(
-                'expense_type'
-            ).annotate(
-                total=Sum('amount'),
-                count=Count('id')
-            ).order_by('-total')
-            
             context['top_spending_categories'] = [
                 {
                     'category': cat['expense_type'],
-                    'amount': float(cat['total']),
+                    'amount': cat['total'],
                     'transactions': cat['count']
                 }
                 for cat in spending_categories[:3]
@@ -245,59 +477,75 @@ BE SPECIFIC:
             return {'age': 16, 'monthly_allowance': 0, 'currency': 'KGS'}
     
     async def _get_conversation_history(self, user: User) -> List[Dict[str, str]]:
-        """Get recent conversation history for context"""
+        """Get recent conversation history for context, oldest turn first"""
+        key = history_cache_key(user.id)
+        history = await cache.aget(key)
+        if history is not None:
+            return history
         try:
-            recent_sessions = user.teen_chat_sessions.order_by('-updated_at')[:2]
+            # Last 3 exchanges per session in one windowed prefetch query;
+            # newest first in SQL, flipped back below
+            recent_sessions = await _alist(
+                user.teen_chat_sessions.order_by('-updated_at').prefetch_related(Prefetch(
+                    'teen_messages',
+                    queryset=TeenChatMessage.objects.only(
+                        'session_id', 'role', 'content'
+                    ).order_by('-created_at', '-id')[:6],
+                    to_attr='recent_messages',
+                ))[:2]
+            )
             history = []
             
-            for session in recent_sessions:
-                messages = session.teen_messages.order_by('created_at')[-6:]  # Last 3 exchanges
-                for msg in messages:
+            for session in reversed(recent_sessions):
+                for msg in reversed(session.recent_messages):
                     if msg.role in ['user', 'teen_coach']:
                         history.append({
                             'role': msg.role,
                             'content': msg.content
                         })
             
+            history = history[-HISTORY_LENGTH:]
+            await cache.aset(key, history, HISTORY_CACHE_SECONDS)
             return history
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
             return []
     
+    async def _remember_turn(self, user: User, user_message: str, reply: str):
+        """Append the new exchange to a cached history; a cold key is rebuilt from the DB on next read"""
+        key = history_cache_key(user.id)
+        history = await cache.aget(key)
+        if history is None:
+            return
+        history.extend([
+            {'role': 'user', 'content': user_message},
+            {'role': 'teen_coach', 'content': reply},
+        ])
+        await cache.aset(key, history[-HISTORY_LENGTH:], HISTORY_CACHE_SECONDS)
+    
     async def _analyze_educational_content(self, response: str, user_message: str) -> Dict[str, Any]:
         """Analyze if response contains educational content"""
-        educational_indicators = [
-            'важно понимать', 'запомни', 'правило', 'совет', 'объясняю',
-            'почему это важно', 'пример', 'подумай о том',
-            'чтобы научиться', 'навык', 'умение'
-        ]
-        
-        actionable_indicators = [
-            'попробуй', 'начни с', 'сделай', 'поставь цель', 'считай',
-            'запиши', 'план', 'шаг', 'действие', 'измени'
-        ]
-        
         response_lower = response.lower()
-        message_lower = user_message.lower()
         
-        contains_educational = any(indicator in response_lower for indicator in educational_indicators)
-        is_actionable = any(indicator in response_lower for indicator in actionable_indicators)
+        # One C-level scan for both indicator lists; each indicator is counted once
+        found = {'educational': set(), 'actionable': set()}
+        for match in _INDICATORS_RE.finditer(response_lower):
+            found[match.lastgroup].add(match.group())
+        educational_found = found['educational']
+        actionable_found = found['actionable']
         
         # Determine learning objective
-        learning_objective = None
-        if any(word in message_lower for word in ['как', 'как сэкономить', 'как накопить']):
-            learning_objective = "Основы экономии и накоплений"
-        elif any(word in message_lower for word in ['бюджет', 'планировать']):
-            learning_objective = "Планирование бюджета"
-        elif any(word in message_lower for word in ['цель', 'накопить на']):
-            learning_objective = "Постановка и достижение финансовых целей"
+        learning_objective = next(
+            (objective for pattern, objective in _OBJECTIVE_PATTERNS if pattern.search(user_message)),
+            None
+        )
         
         return {
-            'contains_educational': contains_educational,
-            'actionable': is_actionable,
+            'contains_educational': bool(educational_found),
+            'actionable': bool(actionable_found),
             'objective': learning_objective,
-            'educational_indicators_count': sum(1 for indicator in educational_indicators if indicator in response_lower),
-            'actionable_indicators_count': sum(1 for indicator in actionable_indicators if indicator in response_lower)
+            'educational_indicators_count': len(educational_found),
+            'actionable_indicators_count': len(actionable_found)
         }
     
     async def _save_chat_interaction(self, 
@@ -307,38 +555,40 @@ BE SPECIFIC:
                                    analysis: Dict) -> TeenChatSession:
         """Save chat interaction to database"""
         try:
-            # Get or create current session
-            session, created = TeenChatSession.objects.get_or_create(
+            # One coaching session per user per day, so a day's turns share it
+            now = datetime.now()
+            session, created = await TeenChatSession.objects.aget_or_create(
                 user=user,
-                session_id=f"session_{user.id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                session_id=f"session_{user.id}_{now.date().isoformat()}",
                 defaults={
-                    'title': f"Coaching session - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                    'title': f"Coaching session - {now.strftime('%Y-%m-%d %H:%M')}",
                     'conversation_context': analysis,
-                    'coaching_focus': analysis.get('objective', 'General coaching')
+                    'coaching_focus': analysis.get('objective') or 'General coaching'
                 }
             )
             
-            # Save user message
-            TeenChatMessage.objects.create(
-                session=session,
-                role='user',
-                content=user_message,
-                is_educational=analysis.get('contains_educational', False),
-                learning_objective=analysis.get('objective'),
-                was_actionable=analysis.get('actionable', False)
-            )
-            
-            # Save AI response
-            TeenChatMessage.objects.create(
-                session=session,
-                role='teen_coach',
-                content=llm_response.content,
-                is_educational=analysis.get('contains_educational', False),
-                learning_objective=analysis.get('objective'),
-                confidence_score=llm_response.confidence,
-                reasoning_explained=analysis.get('reasoning', ''),
-                was_actionable=analysis.get('actionable', False)
-            )
+            # Save user message and AI response in one multi-row INSERT
+            await TeenChatMessage.objects.abulk_create([
+                TeenChatMessage(
+                    session=session,
+                    role='user',
+                    content=user_message,
+                    is_educational=analysis.get('contains_educational', False),
+                    learning_objective=analysis.get('objective') or '',
+                    was_actionable=analysis.get('actionable', False)
+                ),
+                TeenChatMessage(
+                    session=session,
+                    role='teen_coach',
+                    content=llm_response.content,
+                    is_educational=analysis.get('contains_educational', False),
+                    learning_objective=analysis.get('objective') or '',
+                    confidence_score=llm_response.confidence,
+                    reasoning_explained=analysis.get('reasoning', ''),
+                    was_actionable=analysis.get('actionable', False)
+                ),
+            ])
+            await self._remember_turn(user, user_message, llm_response.content)
             
             return session
             
@@ -349,35 +599,34 @@ BE SPECIFIC:
     async def _check_coaching_achievements(self, user: User, message: str, response: str):
         """Check if user unlocked any achievements through coaching"""
         try:
-            # First coaching conversation achievement
-            if not user.teen_chat_sessions.exists():
-                achievement = Achievement.objects.get(title="Первый разговор с AI")
-                UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement,
-                    defaults={'is_completed': True}
-                )
-            
-            # Ask about goals achievement
-            if any(word in message.lower() for word in ['цель', 'накопить на', 'хочу купить']):
-                achievement = Achievement.objects.get(title="Целеустремленный")
-                UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement,
-                    defaults={'is_completed': True}
-                )
-            
-            # Ask about budgeting achievement
-            if any(word in message.lower() for word in ['бюджет', 'планировать', 'тратить']):
-                achievement = Achievement.objects.get(title="Планировщик бюджета")
-                UserAchievement.objects.get_or_create(
-                    user=user,
-                    achievement=achievement,
-                    defaults={'is_completed': True}
-                )
+            # Static reference data: resolve titles through the cached active list
+            achievement_ids = {
+                achievement.title: achievement.id
+                for achievement in await sync_to_async(get_active_achievements)()
+            }
+            candidate_ids = {
+                achievement_ids[title]
+                for title, pattern in _COACHING_ACHIEVEMENTS
+                if title in achievement_ids and (pattern is None or pattern.search(message))
+            }
+            if not candidate_ids:
+                return
+            
+            earned_ids = {
+                achievement_id async for achievement_id in UserAchievement.objects.filter(
+                    user_id=user.id, achievement_id__in=candidate_ids
+                ).order_by().values_list('achievement_id', flat=True)
+            }
+            new_ids = candidate_ids - earned_ids
+            if not new_ids:
+                return
+            
+            await UserAchievement.objects.abulk_create([
+                UserAchievement(user_id=user.id, achievement_id=achievement_id, is_completed=True)
+                for achievement_id in new_ids
+            ], ignore_conflicts=True)
+            invalidate_user_dashboard(user.id)
                 
-        except Achievement.DoesNotExist:
-            pass  # Achievement not created yet
         except Exception as e:
             logger.error(f"Error checking achievements: {e}")
     
@@ -405,12 +654,11 @@ Answer in 1-2 simple sentences."""
             
         except Exception as e:
             logger.error(f"Error generating reasoning: {e}")
-            return "Совет основан на твоей текущей финансовой ситуации и целях."
+            return _DEFAULT_REASONING
     
     async def get_personalized_savings_advice(self, user: User, goal: UserGoal) -> Dict[str, Any]:
         """Get specific savings advice for a particular goal"""
         try:
-            profile = user.teen_profile
             context = await self._build_user_context(user)
             
             # Add goal-specific context
@@ -424,7 +672,7 @@ Answer in 1-2 simple sentences."""
                 'days_remaining': goal.days_remaining()
             }
             
-            system_prompt = self._create_coaching_system_prompt(profile, goal_context)
+            system_prompt = self._create_coaching_system_prompt(goal_context)
             
             savings_question = f"""
 Помоги подростку накопить на цель: {goal.title}
@@ -472,30 +720,25 @@ Answer in 1-2 simple sentences."""
             
             expenses = user.teen_expenses.filter(date__gte=start_date, date__lte=end_date)
             
-            if not expenses.exists():
+            # Analyze patterns; one grouped query also answers "any data?" and the total
+            by_category = await _alist(_spending_by_category(expenses))
+            if not by_category:
                 return {'message': 'Пока нет данных для анализа. Начни записывать расходы!'}
             
-            # Analyze patterns
-            total_spent = float(expenses.aggregate(total=Sum('amount'))['total'] or 0)
-            
-            by_category = expenses.values('expense_type').annotate(
-                total=Sum('amount'),
-                count=Count('id')
-            ).order_by('-total')
+            total_spent = sum(cat['total'] for cat in by_category)
             
             category_analysis = []
             for cat in by_category:
                 percentage = (cat['total'] / total_spent) * 100 if total_spent > 0 else 0
                 category_analysis.append({
                     'category': cat['expense_type'],
-                    'amount': float(cat['total']),
+                    'amount': cat['total'],
                     'percentage': percentage,
                     'transactions': cat['count']
                 })
             
             # Generate AI insights
-            profile = user.teen_profile
-            system_prompt = self._create_coaching_system_prompt(profile, context)
+            system_prompt = self._create_coaching_system_prompt(context)
             
             analysis_prompt = f"""
 Проанализируй расходы подростка за последние {days} дней:
@@ -514,13 +757,24 @@ Answer in 1-2 simple sentences."""
                 {"role": "user", "content": analysis_prompt}
             ]
             
-            response = await self.llm.chat(messages, temperature=0.5, max_tokens=400)
+            # Spending shifts slowly; the same breakdown gets the same insights for a while
+            signature = hashlib.blake2b(
+                (system_prompt + analysis_prompt).encode('utf-8'), digest_size=16
+            ).hexdigest()
+            insights_key = f"spend_ai:{user.id}:{days}:{signature}"
+            ai_insights = await cache.aget(insights_key)
+            if ai_insights is None:
+                response = await self.llm.chat(messages, temperature=0.5, max_tokens=400)
+                ai_insights = response.content
+                # Provider error fallbacks come back without metadata; don't keep those
+                if response.metadata is not None:
+                    await cache.aset(insights_key, ai_insights, SPENDING_INSIGHTS_CACHE_SECONDS)
             
             return {
                 'total_spent': total_spent,
                 'days_analyzed': days,
                 'category_breakdown': category_analysis,
-                'ai_insights': response.content,
+                'ai_insights': ai_insights,
                 'average_daily': total_spent / days if days > 0 else 0
             }
             
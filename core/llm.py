@@ -1,11 +1,15 @@
 import json
 import hashlib
 import re
-from typing import List, Dict, Any, Optional, Set
+import unicodedata
+from functools import lru_cache
+from typing import List, Dict, Any, FrozenSet, Optional, Set, Tuple
 
 import requests
 from django.conf import settings
 from django.db.models import Q
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from core.models import ChatMessage, ChatSession
 from core.utils.anonymizer import anonymize_text, anonymize_csv_data
@@ -21,6 +25,11 @@ try:
 except ImportError:
     genai = None
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ============================================================================
 # КОНФИГУРАЦИЯ API LLM
@@ -31,6 +40,64 @@ except ImportError:
 # LLM_MODEL=openai/gpt-4o-mini
 # ============================================================================
 
+def _build_session() -> requests.Session:
+    """Общая HTTP-сессия: keep-alive переиспользует TCP/TLS-соединение с LLM API между запросами."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=32,
+        # Повторяем только 5xx; последний ответ возвращается как есть, чтобы вызывающий
+        # код видел HTTP-статус и сообщение об ошибке, как раньше. 429 не повторяем:
+        # urllib3 ждёт Retry-After, а chat_with_context быстрее уйдёт на следующую модель.
+        max_retries=Retry(
+            total=2,
+            connect=0,
+            read=0,
+            backoff_factor=0.2,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_SESSION = _build_session()
+
+
+# Запасные модели для бесплатных/экспериментальных, в порядке попыток
+_FALLBACK_MODELS = (
+    'google/gemini-2.0-flash-exp:free',
+    'deepseek/deepseek-r1:free',
+    'meta-llama/llama-3-8b-instruct:free',
+    'deepseek/deepseek-chat',  # Cheap paid as last resort
+)
+
+
+def _encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Тело запроса к LLM: orjson сразу отдаёт UTF-8 bytes, иначе стандартный json."""
+    if orjson is None:
+        return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return orjson.dumps(payload)
+
+
+def _decode_response(resp: requests.Response) -> Any:
+    """Тело ответа LLM; не-JSON (HTML-страница ошибки и т.п.) поднимает ValueError."""
+    if orjson is None:
+        return resp.json()
+    return orjson.loads(resp.content)
+
+
+def _reply_content(data: Any) -> Optional[str]:
+    """choices[0].message.content из ответа OpenAI-совместимого API, None при другом формате."""
+    try:
+        return data['choices'][0]['message']['content']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
 def _headers() -> Dict[str, str]:
     """
     Формирует заголовки для запроса к LLM API.
@@ -59,28 +126,55 @@ def _headers() -> Dict[str, str]:
     return headers
 
 
-def _compute_content_hash(content: str) -> str:
-    """Вычисляет SHA256 хеш содержимого для проверки на повторения"""
+_WS_RE = re.compile(r'\s+')
+# Маркер пункта списка: "-", "*", "•", "+" или нумерация "1."
+_BULLET_CHARS = frozenset('-*•+')
+_NUMBERED_RE = re.compile(r'\d+\.')
+
+
+_SNIPPET_SEP = '\x00'
+# Невидимые и управляющие символы (zero-width, BOM, C0 кроме пробельных) — не влияют на сравнение
+_INVISIBLE_RE = re.compile('[\u200b-\u200f\ufeff\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _fold_snippet(text: str) -> str:
+    """Канонический вид фрагмента для сравнения: NFKC, без невидимых символов, casefold, схлопнутые пробелы."""
+    if not unicodedata.is_normalized('NFKC', text):
+        text = unicodedata.normalize('NFKC', text)
+    return _WS_RE.sub(' ', _INVISIBLE_RE.sub('', text).casefold()).strip()
+
+
+def _normalize_content(content: str) -> str:
     # Нормализуем: удаляем лишние пробелы, приводим к нижнему регистру для сравнения
-    normalized = re.sub(r'\s+', ' ', content.strip().lower())
-    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    return _WS_RE.sub(' ', content.strip().lower())
+
+
+def _compute_content_hash(content: str) -> str:
+    """
+    Вычисляет SHA256 хеш содержимого для проверки на повторения (хранится в ChatMessage.content_hash).
+
+    Алгоритм менять нельзя без пересчёта уже сохранённых хешей: _check_for_duplicates ищет
+    точные повторы сравнением с колонкой content_hash. Хешируется один текст на сообщение,
+    фрагменты сравниваются без хеширования, так что на скорость это не влияет.
+    """
+    return hashlib.sha256(_normalize_content(content).encode('utf-8')).hexdigest()
 
 
 def _extract_advice_snippets(content: str) -> List[str]:
     """Извлекает отдельные советы из текста для проверки на повторения"""
     snippets = []
     # Ищем списки, пункты, параграфы
-    lines = content.split('\n')
     current_snippet = []
-    for line in lines:
+    for line in content.split('\n'):
         line = line.strip()
         if not line:
             if current_snippet:
                 snippets.append(' '.join(current_snippet))
                 current_snippet = []
             continue
-        # Проверяем, начинается ли строка с маркера списка
-        if re.match(r'^[-*•\d+\.]', line):
+        # Проверяем, начинается ли строка с маркера списка; регулярка нужна только для "1."
+        first = line[0]
+        if first in _BULLET_CHARS or (first.isdigit() and _NUMBERED_RE.match(line)):
             if current_snippet:
                 snippets.append(' '.join(current_snippet))
             current_snippet = [line]
@@ -91,44 +185,121 @@ def _extract_advice_snippets(content: str) -> List[str]:
     return snippets
 
 
-def _check_for_duplicates(new_content: str, session: ChatSession, similarity_threshold: float = 0.8) -> bool:
+@lru_cache(maxsize=2048)
+def _message_snippet_index(content: str) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    """
+    Фрагменты ответа для _check_for_duplicates в виде _fold_snippet: множество всех
+    фрагментов и отдельно длинные (>20 символов). Ключ — сам текст, поэтому история
+    сессии разбирается один раз на процесс, а не на каждом новом ответе.
+    """
+    folded = [(_fold_snippet(snip), len(snip) > 20) for snip in _extract_advice_snippets(content)]
+    return (
+        frozenset(text for text, _ in folded if text),
+        tuple(text for text, is_long in folded if is_long and text),
+    )
+
+
+# Порог схожести (Жаккар по словам), выше которого ответ считается почти дословным
+# повтором: повторный запрос к модели тогда не делается
+_NEAR_DUPLICATE_THRESHOLD = 0.95
+_NEAR_DUPLICATE_MARKER = "⚠ похоже на предыдущий совет"
+
+# Результаты _check_for_duplicates
+_DUPLICATE_SIMILAR = 'similar'
+_DUPLICATE_NEAR_IDENTICAL = 'near_identical'
+
+
+def split_near_duplicate_marker(reply: str) -> Tuple[str, bool]:
+    """
+    Отделяет пометку о почти дословном повторе, которую добавляет chat_with_context.
+    Пометка только для показа: в ChatMessage сохраняется сам ответ, иначе она попадёт
+    в content_hash и в историю, которую видит модель.
+    """
+    prefix = f"{_NEAR_DUPLICATE_MARKER}\n\n"
+    if reply.startswith(prefix):
+        return reply[len(prefix):], True
+    return reply, False
+
+
+@lru_cache(maxsize=2048)
+def _message_word_set(content: str) -> FrozenSet[str]:
+    """Слова всего ответа после _fold_snippet; кешируется по тексту, как _message_snippet_index."""
+    return frozenset(_fold_snippet(content).split())
+
+
+def _words_near_identical(new_words: FrozenSet[str], prev_words: FrozenSet[str]) -> bool:
+    """Жаккар двух множеств слов не ниже _NEAR_DUPLICATE_THRESHOLD."""
+    new_size, prev_size = len(new_words), len(prev_words)
+    # Жаккар не больше отношения размеров: такие пары отсекаются без пересечения
+    if not new_size or min(new_size, prev_size) < _NEAR_DUPLICATE_THRESHOLD * max(new_size, prev_size):
+        return False
+    common = len(new_words & prev_words)
+    return common >= _NEAR_DUPLICATE_THRESHOLD * (new_size + prev_size - common)
+
+
+def _snippets_contain(new_long: Tuple[str, ...], prev_long: List[str]) -> bool:
+    """
+    Содержит ли длинный фрагмент одной стороны фрагмент другой. Вместо перебора
+    всех пар каждая сторона склеивается через разделитель (_fold_snippet его
+    вырезает, в тексте он не встречается), и каждый фрагмент ищется одним проходом
+    по склейке другой стороны.
+    """
+    if not new_long or not prev_long:
+        return False
+    new_joined = _SNIPPET_SEP.join(new_long)
+    prev_joined = _SNIPPET_SEP.join(prev_long)
+    # Фрагмент длиннее всех фрагментов другой стороны ни в одном из них не содержится:
+    # такие отсекаются сравнением длин, без прохода по склейке
+    max_new = max(map(len, new_long))
+    max_prev = max(map(len, prev_long))
+    return (
+        any(prev_lower in new_joined for prev_lower in prev_long if len(prev_lower) <= max_new)
+        or any(new_lower in prev_joined for new_lower in new_long if len(new_lower) <= max_prev)
+    )
+
+
+def _check_for_duplicates(new_content: str, session: ChatSession, similarity_threshold: float = 0.8) -> Optional[str]:
     """
     Проверяет, есть ли похожие советы в истории сессии.
-    Возвращает True, если найдены дубликаты.
+    Возвращает None, если дубликатов нет, _DUPLICATE_NEAR_IDENTICAL, если ответ к тому же
+    почти дословно повторяет один из прошлых (точный хеш или Жаккар по словам не ниже
+    _NEAR_DUPLICATE_THRESHOLD), иначе _DUPLICATE_SIMILAR.
     similarity_threshold: порог схожести (0-1), по умолчанию 0.8
     """
     new_hash = _compute_content_hash(new_content)
-    new_snippets = _extract_advice_snippets(new_content)
     
     # Получаем все предыдущие ответы ассистента в этой сессии
-    previous_messages = ChatMessage.objects.filter(
-        session=session,
-        role='assistant'
-    ).exclude(content_hash=new_hash)
-    
-    for prev_msg in previous_messages:
-        prev_hash = prev_msg.content_hash
-        # Простая проверка по хешу
-        if new_hash == prev_hash:
-            return True
-        
-        # Проверка по извлеченным фрагментам
-        prev_snippets = _extract_advice_snippets(prev_msg.content)
-        for new_snip in new_snippets:
-            new_snip_hash = _compute_content_hash(new_snip)
-            for prev_snip in prev_snippets:
-                prev_snip_hash = _compute_content_hash(prev_snip)
-                # Если хеши совпадают или очень похожи по длине и содержанию
-                if new_snip_hash == prev_snip_hash:
-                    return True
-                # Дополнительная проверка: если один фрагмент содержит другой
-                if len(new_snip) > 20 and len(prev_snip) > 20:
-                    new_lower = new_snip.lower()
-                    prev_lower = prev_snip.lower()
-                    if new_lower in prev_lower or prev_lower in new_lower:
-                        return True
-    
-    return False
+    previous_messages = ChatMessage.objects.filter(session=session, role='assistant')
+    
+    # Простая проверка по хешу: точный повтор находится по индексу content_hash,
+    # без загрузки и разбора истории
+    if previous_messages.filter(content_hash=new_hash).exists():
+        return _DUPLICATE_NEAR_IDENTICAL
+    
+    # Фрагменты сравниваются по каноническому тексту (_fold_snippet) через set,
+    # без криптографического хеша на каждую пару
+    new_normalized, new_long = _message_snippet_index(new_content)
+    new_words = _message_word_set(new_content)
+    
+    # Один проход по истории: совпадение фрагментов и почти дословный повтор
+    snippet_match = near_identical = False
+    prev_long = []
+    for prev_content in previous_messages.values_list('content', flat=True):
+        if not near_identical:
+            near_identical = _words_near_identical(new_words, _message_word_set(prev_content))
+        if not snippet_match:
+            # Проверка по извлеченным фрагментам (разобранным один раз на текст сообщения)
+            prev_normalized, prev_msg_long = _message_snippet_index(prev_content)
+            # Совпадение после нормализации
+            snippet_match = not new_normalized.isdisjoint(prev_normalized)
+            prev_long.extend(prev_msg_long)
+        if snippet_match and near_identical:
+            break
+    
+    # Дополнительная проверка: если один фрагмент содержит другой
+    if not snippet_match and not _snippets_contain(new_long, prev_long):
+        return None
+    return _DUPLICATE_NEAR_IDENTICAL if near_identical else _DUPLICATE_SIMILAR
 
 
 def get_ai_advice_from_data(data_blob: str, extra_instruction: str = "", anonymize: bool = True, user=None) -> str:
@@ -187,12 +358,12 @@ def get_ai_advice_from_data(data_blob: str, extra_instruction: str = "", anonymi
         "max_tokens": getattr(settings, 'LLM_MAX_TOKENS', 4000),  # Ограничиваем токены для экономии
     }
     try:
-        resp = requests.post(settings.LLM_API_URL, headers=_headers(), json=payload, timeout=60)
+        resp = _SESSION.post(settings.LLM_API_URL, headers=_headers(), data=_encode_payload(payload), timeout=60)
         
         if resp.status_code != 200:
             error_detail = f"HTTP {resp.status_code}"
             try:
-                error_data = resp.json()
+                error_data = _decode_response(resp)
                 if 'error' in error_data:
                     error_msg = error_data['error'].get('message', str(error_data['error']))
                     error_detail = error_msg
@@ -203,10 +374,10 @@ def get_ai_advice_from_data(data_blob: str, extra_instruction: str = "", anonymi
                 error_detail = resp.text[:200] if resp.text else f"HTTP {resp.status_code}"
             return f"[AI ошибка] {error_detail}"
         
-        data = resp.json()
-        if 'choices' not in data or not data['choices']:
+        content = _reply_content(_decode_response(resp))
+        if content is None:
             return "[AI ошибка] Неожиданный формат ответа от API."
-        return data['choices'][0]['message']['content']
+        return content
     except requests.exceptions.RequestException as ex:
         return f"[AI ошибка] Ошибка сети: {ex}"
     except Exception as ex:
@@ -358,55 +529,62 @@ def chat_with_context(
     
     # Добавляем fallback модели, если используемая модель бесплатная или экспериментальная
     if ':free' in model or 'exp' in model:
-        fallbacks = [
-            'google/gemini-2.0-flash-exp:free',
-            'deepseek/deepseek-r1:free',
-            'meta-llama/llama-3-8b-instruct:free',
-            'deepseek/deepseek-chat',  # Cheap paid as last resort
-        ]
-        for fb in fallbacks:
+        for fb in _FALLBACK_MODELS:
             if fb != model and fb not in models_to_try:
                 models_to_try.append(fb)
     
     last_error = ""
+    # Одинаковы для всех моделей из списка — считаются один раз
+    headers = _headers()
+    max_tokens = getattr(settings, 'LLM_MAX_TOKENS', 4000)
     
     for current_model in models_to_try:
         payload = {
             "model": current_model,
             "messages": full_messages,
-            "max_tokens": getattr(settings, 'LLM_MAX_TOKENS', 4000),
+            "max_tokens": max_tokens,
         }
         
         try:
             # print(f"Trying model: {current_model}")
-            resp = requests.post(settings.LLM_API_URL, headers=_headers(), json=payload, timeout=60)
+            resp = _SESSION.post(settings.LLM_API_URL, headers=headers, data=_encode_payload(payload), timeout=60)
+            
+            # Тело разбирается один раз: и для ответа, и для текста ошибки
+            try:
+                data = _decode_response(resp)
+            except ValueError:
+                data = None
             
             if resp.status_code == 200:
-                data = resp.json()
-                if 'choices' in data and data['choices']:
-                    reply = data['choices'][0]['message']['content']
+                reply = _reply_content(data)
+                if reply is not None:
                     
                     # Проверяем на повторения, если включена проверка
                     if check_duplicates and session:
-                        if _check_for_duplicates(reply, session):
+                        duplicate = _check_for_duplicates(reply, session)
+                        if duplicate:
+                            # Почти дословный повтор: новый запрос, скорее всего, снова
+                            # даст повтор, поэтому ответ возвращается с пометкой
+                            # (перед сохранением её снимает split_near_duplicate_marker)
+                            if duplicate == _DUPLICATE_NEAR_IDENTICAL:
+                                return f"{_NEAR_DUPLICATE_MARKER}\n\n{reply}"
                             sys_prompt += "\n\nОбнаружены повторения в предыдущих ответах. Пожалуйста, дай совершенно новый, уникальный совет, который еще не был дан в этой сессии."
                             full_messages = [{"role": "system", "content": sys_prompt}] + messages
                             payload['messages'] = full_messages
                             # Повторный запрос к той же модели
-                            resp_retry = requests.post(settings.LLM_API_URL, headers=_headers(), json=payload, timeout=60)
+                            resp_retry = _SESSION.post(settings.LLM_API_URL, headers=headers, data=_encode_payload(payload), timeout=60)
                             if resp_retry.status_code == 200:
-                                data_retry = resp_retry.json()
-                                if 'choices' in data_retry and data_retry['choices']:
-                                    return data_retry['choices'][0]['message']['content']
+                                reply_retry = _reply_content(_decode_response(resp_retry))
+                                if reply_retry is not None:
+                                    return reply_retry
                     
                     return reply
             
             # Если ошибка, сохраняем и пробуем следующую
-            try:
-                err_data = resp.json()
-                err_msg = err_data.get('error', {}).get('message', str(err_data))
-                last_error = f"{current_model}: {err_msg}"
-            except:
+            err = data.get('error', {}) if isinstance(data, dict) else None
+            if isinstance(err, dict):
+                last_error = f"{current_model}: {err.get('message', str(data))}"
+            else:
                 last_error = f"{current_model}: HTTP {resp.status_code}"
                 
         except Exception as e:
@@ -459,12 +637,14 @@ def _call_local_llm(messages: List[Dict[str, str]], user_data: str = "", user=No
     }
     
     try:
-        resp = requests.post(ollama_url, json=payload, timeout=120)
+        resp = _SESSION.post(
+            ollama_url, headers={'Content-Type': 'application/json'}, data=_encode_payload(payload), timeout=120,
+        )
         
         if resp.status_code != 200:
             return f"[Локальная LLM ошибка] HTTP {resp.status_code}. Убедитесь, что Ollama запущен."
         
-        data = resp.json()
+        data = _decode_response(resp)
         if 'message' in data and 'content' in data['message']:
             return data['message']['content']
         elif 'response' in data:
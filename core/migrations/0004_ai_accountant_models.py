@@ -0,0 +1,74 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_expense_expense_type_alter_income_income_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usergoal',
+            name='probability_of_success',
+            field=models.PositiveIntegerField(default=0, help_text='0-100%'),
+        ),
+        migrations.AddField(
+            model_name='usergoal',
+            name='projected_date_if_current_trend',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AIRecommendationLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_key', models.CharField(blank=True, max_length=7)),
+                ('text', models.TextField()),
+                ('recommendation_type', models.CharField(choices=[('goal_progress', 'Progress towards goal'), ('forecast_advice', 'Advice based on forecast'), ('general_advice', 'General financial advice')], max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('goal', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.usergoal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Transaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('category', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+                ('source', models.CharField(default='manual', max_length=50)),
+                ('is_verified', models.BooleanField(default=True)),
+                ('month_key', models.CharField(db_index=True, max_length=7)),
+                ('legacy_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('legacy_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_key', models.CharField(db_index=True, max_length=7)),
+                ('total_income', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_expense', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('profit', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ai_monthly_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Monthly Summaries',
+                'unique_together': {('user', 'month_key')},
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('user', 'legacy_id', 'legacy_type'), name='uniq_tx_user_legacy'),
+        ),
+    ]
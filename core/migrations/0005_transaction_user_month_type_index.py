@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_ai_accountant_models'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'month_key', 'type'], name='core_transa_user_id_b0f083_idx'),
+        ),
+    ]
@@ -1,18 +1,26 @@
 from datetime import date
 from typing import Optional, Dict
 
-from sklearn.linear_model import LinearRegression
 import numpy as np
 from core.utils.ai_utils import ai_predict_next_month
+from core.utils.analytics import monthly_totals
 
 
-def forecast_next_month_profit(incomes_qs, expenses_qs, user=None) -> Dict:
+def forecast_next_month_profit(incomes_qs, expenses_qs, user=None, monthly=None) -> Dict:
     """
     Returns a dict with 'next_month_profit', 'reasoning', and 'method'.
+    monthly: monthly_totals() of the same querysets, if the caller already has it.
     """
+    if monthly is None:
+        monthly = monthly_totals(incomes_qs, expenses_qs)
+
+    # No history yet: answer before spending an LLM round-trip on an empty prompt
+    if not monthly:
+        return {'next_month_profit': 0.0, 'method': 'None', 'reasoning': 'Нет данных'}
+
     # Try AI prediction first if user is provided
     if user:
-        ai_res = ai_predict_next_month(user, incomes_qs, expenses_qs)
+        ai_res = ai_predict_next_month(user, incomes_qs, expenses_qs, monthly=monthly)
         if ai_res and ai_res.get('next_month_profit_prediction') is not None:
             return {
                 'next_month_profit': ai_res['next_month_profit_prediction'],
@@ -20,30 +28,17 @@ def forecast_next_month_profit(incomes_qs, expenses_qs, user=None) -> Dict:
                 'method': 'AI (LLM)'
             }
 
-    # Aggregate by month
-    by_month = {}
-    for o in incomes_qs:
-        key = o.date.replace(day=1)
-        by_month[key] = by_month.get(key, 0.0) + float(o.amount)
-    for o in expenses_qs:
-        key = o.date.replace(day=1)
-        by_month[key] = by_month.get(key, 0.0) - float(o.amount)
-
-    if not by_month:
-        return {'next_month_profit': 0.0, 'method': 'None', 'reasoning': 'Нет данных'}
-
-    months = sorted(by_month.keys())
-    profits = [by_month[m] for m in months]
+    profits = [totals.get('income', 0.0) - totals.get('expense', 0.0) for totals in monthly.values()]
     
     if len(profits) < 2:
         return {'next_month_profit': profits[0] if profits else 0.0, 'method': 'Static', 'reasoning': 'Мало данных для анализа тренда.'}
 
-    X = np.array(range(len(months))).reshape(-1, 1)
-    y = np.array(profits)
-    model = LinearRegression()
-    model.fit(X, y)
-    next_idx = np.array([[len(months)]])
-    pred = float(model.predict(next_idx)[0])
+    # Single-feature least squares in closed form; no need to fit a sklearn estimator.
+    x = np.arange(len(profits), dtype=np.float64)
+    y = np.asarray(profits, dtype=np.float64)
+    x_c = x - x.mean()
+    slope = np.dot(x_c, y - y.mean()) / np.dot(x_c, x_c)
+    pred = float(y.mean() + slope * (len(profits) - x.mean()))
     
     return {
         'next_month_profit': round(pred, 2),
@@ -1,4 +1,6 @@
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -9,12 +11,39 @@ from django.conf import settings
 MODEL_PATH = Path(getattr(settings, 'MEDIA_ROOT', Path.cwd()) / 'ml' / 'expense_classifier.joblib')
 
 
+# Deterministic keyword rules, in priority order
+_KEYWORD_RULES = (
+    ('rent', ('аренда', 'офис', 'помещ')),
+    ('tax', ('налог', 'ндс', 'фнс')),
+    ('salary', ('зарплат', 'оклад')),
+    ('marketing', ('реклам', 'маркет')),
+    ('purchase', ('закуп', 'покуп')),
+)
+
+# One compiled pattern per rule, searched in priority order: the first rule with a
+# keyword anywhere in the text wins, exactly as a chain of `in` checks would (not
+# the leftmost keyword, so "налог за офис" is rent).
+_KEYWORD_PATTERNS = tuple(
+    (cat, re.compile('|'.join(map(re.escape, words))))
+    for cat, words in _KEYWORD_RULES
+)
+
+
+@lru_cache(maxsize=4)
+def _load_model(path: str, mtime: float):
+    # mtime is part of the key: retraining rewrites the file and forces a reload.
+    # The weight arrays are memory-mapped read-only, so every worker process on
+    # the host shares one copy through the page cache instead of unpickling its own.
+    return joblib.load(path, mmap_mode='r')
+
+
 class ExpenseAutoCategorizer:
     def __init__(self) -> None:
         self.model = None
         try:
-            if MODEL_PATH.exists():
-                self.model = joblib.load(MODEL_PATH)
+            self.model = _load_model(str(MODEL_PATH), MODEL_PATH.stat().st_mtime)
+        except FileNotFoundError:
+            pass  # Not trained yet; the keyword rules below still apply
         except Exception:
             self.model = None
 
@@ -22,6 +51,11 @@ class ExpenseAutoCategorizer:
         text = (text or '').strip()
         if not text:
             return None
+        # Keyword fast path: an unambiguous rule hit skips the TF-IDF pipeline
+        low = text.lower()
+        for cat, pattern in _KEYWORD_PATTERNS:
+            if pattern.search(low):
+                return cat
         # ML path
         if self.model is not None:
             try:
@@ -29,17 +63,5 @@ class ExpenseAutoCategorizer:
                 return str(pred)
             except Exception:
                 pass
-        # Fallback simple rules
-        low = text.lower()
-        if any(w in low for w in ['аренда', 'офис', 'помещ']):
-            return 'rent'
-        if any(w in low for w in ['налог', 'ндс', 'фнс']):
-            return 'tax'
-        if any(w in low for w in ['зарплат', 'оклад']):
-            return 'salary'
-        if any(w in low for w in ['реклам', 'маркет']):
-            return 'marketing'
-        if any(w in low for w in ['закуп', 'покуп']):
-            return 'purchase'
         return 'other'
 
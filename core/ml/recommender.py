@@ -1,28 +1,27 @@
-from collections import defaultdict
 from django.db.models import Sum
 
+from core.utils.analytics import monthly_totals
 
-def build_recommendations(incomes_qs, expenses_qs):
+
+def build_recommendations(incomes_qs, expenses_qs, expense_by_category=None, monthly=None):
+    """expense_by_category / monthly: already fetched expense_type/total rows and
+    monthly_totals(), if the caller has them."""
     recs = []
 
     # 1) Excessive spend in any category > 40% of total expenses
-    total_expense = expenses_qs.aggregate(total=Sum('amount'))['total'] or 0
     # Use expense_type instead of category
-    by_cat = expenses_qs.values('expense_type').annotate(total=Sum('amount')).order_by('-total')
+    by_cat = expense_by_category
+    if by_cat is None:
+        by_cat = list(expenses_qs.values('expense_type').annotate(total=Sum('amount')).order_by('-total'))
+    total_expense = sum(row['total'] or 0 for row in by_cat)
     for row in by_cat:
         if total_expense and row['total'] / total_expense > 0.4:
             recs.append(f"Слишком высокие расходы по категории '{row['expense_type']}'. Рассмотрите оптимизацию затрат.")
 
     # 2) Income trend decrease: compare last 3 months vs previous 3
-    def monthly(qs):
-        agg = defaultdict(float)
-        for o in qs:
-            k = o.date.replace(day=1)
-            agg[k] += float(o.amount)
-        months = sorted(agg.keys())
-        return months, [agg[m] for m in months]
-
-    m, v = monthly(incomes_qs)
+    if monthly is None:
+        monthly = monthly_totals(incomes_qs, expenses_qs)
+    v = [totals['income'] for totals in monthly.values() if 'income' in totals]
     if len(v) >= 6:
         recent = sum(v[-3:]) / 3
         prev = sum(v[-6:-3]) / 3
@@ -650,6 +650,15 @@ class Transaction(models.Model):
     legacy_id = models.PositiveIntegerField(null=True, blank=True)
     legacy_type = models.CharField(max_length=20, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'month_key', 'type']),
+        ]
+        constraints = [
+            # Lets the legacy Income/Expense sync upsert in bulk.
+            models.UniqueConstraint(fields=['user', 'legacy_id', 'legacy_type'], name='uniq_tx_user_legacy'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.month_key:
             self.month_key = self.date.strftime('%Y-%m')
@@ -1,25 +1,104 @@
 """
-Сигналы Django для автоматического обновления финансовой памяти
-после создания/обновления/удаления транзакций.
+Сигналы Django: пересчёт MonthlySummary после изменения транзакций и сброс
+кэшей (версия доходов/расходов, достижения, дашборд геймификации, история AI-коуча).
 """
+import threading
+
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Income, Expense
-from .utils.analytics import update_user_financial_memory
+from .ai_accountant_logic import calculate_monthly_summaries
+from .ai_services.gamification import invalidate_active_achievements, invalidate_user_dashboard
+from .ai_services.teen_coach import invalidate_conversation_history
+from .models import (
+    Achievement, Expense, Income, TeenChatSession, Transaction,
+    UserAchievement, UserProfile, UserProgress,
+)
+from .utils.analytics import bump_transactions_version
 
 
 @receiver(post_save, sender=Income)
 @receiver(post_save, sender=Expense)
 @receiver(post_delete, sender=Income)
 @receiver(post_delete, sender=Expense)
-def update_financial_memory_on_transaction_change(sender, instance, **kwargs):
-    """Обновляет финансовую память пользователя после изменения транзакций."""
-    if instance.user:
-        try:
-            # Обновляем память принудительно
-            update_user_financial_memory(instance.user, force_refresh=True)
-        except Exception:
-            # Игнорируем ошибки, чтобы не блокировать сохранение транзакции
-            pass
+def bump_transactions_version_on_change(sender, instance, **kwargs):
+    """Сбрасывает кэши, построенные по доходам/расходам пользователя."""
+    bump_transactions_version(instance.user_id)
+
+
+# Очередь пересчёта MonthlySummary текущей транзакции БД этого потока
+_pending_summary_months = threading.local()
+
+
+class _MonthlySummaryBatch:
+    """(user_id, month_key), изменённые в одной транзакции; пересчитываются после коммита."""
+
+    def __init__(self):
+        self.months = set()
+
+    def __call__(self):
+        if getattr(_pending_summary_months, 'batch', None) is self:
+            _pending_summary_months.batch = None
+        months_by_user = {}
+        for user_id, month_key in self.months:
+            months_by_user.setdefault(user_id, set()).add(month_key)
+        # Пользователь мог быть удалён после того, как его месяц попал в очередь
+        for user_id, user in User.objects.in_bulk(months_by_user).items():
+            calculate_monthly_summaries(user, month_keys=sorted(months_by_user[user_id]))
+
+
+def _summary_batch() -> _MonthlySummaryBatch:
+    """
+    Очередь текущей транзакции. При откате Django выбрасывает её колбэк, и
+    очередь вместе с месяцами из отменённых записей больше не используется.
+    """
+    batch = getattr(_pending_summary_months, 'batch', None)
+    connection = transaction.get_connection()
+    if batch is not None and any(func is batch for _, func, _ in connection.run_on_commit):
+        return batch
+    batch = _pending_summary_months.batch = _MonthlySummaryBatch()
+    return batch
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def update_monthly_summary_on_transaction_change(sender, instance, **kwargs):
+    """
+    Ставит месяц измененной транзакции в очередь на пересчёт MonthlySummary.
+    Массовое удаление пересчитывает каждый месяц один раз при коммите, а не на каждую строку.
+    """
+    # При удалении пользователя его MonthlySummary удаляются тем же каскадом
+    if isinstance(kwargs.get('origin'), User):
+        return
+    batch = _summary_batch()
+    is_new = not batch.months
+    batch.months.add((instance.user_id, instance.month_key))
+    if is_new:
+        # Вне транзакции on_commit выполняется сразу
+        transaction.on_commit(batch)
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def invalidate_achievements_cache_on_change(sender, instance, **kwargs):
+    """Сбрасывает кэш активных достижений после изменения таблицы."""
+    invalidate_active_achievements()
+
+
+@receiver(post_save, sender=UserAchievement)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_save, sender=UserProgress)
+@receiver(post_delete, sender=UserAchievement)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_delete, sender=UserProgress)
+def invalidate_dashboard_cache_on_change(sender, instance, **kwargs):
+    """Сбрасывает кэш геймификации на дашборде пользователя."""
+    invalidate_user_dashboard(instance.user_id)
+
 
+@receiver(post_delete, sender=TeenChatSession)
+def invalidate_conversation_history_on_delete(sender, instance, **kwargs):
+    """Сбрасывает кэш истории AI-коуча после удаления сессии."""
+    invalidate_conversation_history(instance.user_id)
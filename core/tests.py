@@ -0,0 +1,310 @@
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.ai_services.gamification import GamificationEngine, dashboard_cache_key
+from core.ai_services.teen_coach import _COACHING_REPLY_FORMAT, _coaching_reply_format, _parse_coaching_reply
+from core import llm
+from core.llm import (
+    _DUPLICATE_NEAR_IDENTICAL, _DUPLICATE_SIMILAR, _NEAR_DUPLICATE_MARKER, _check_for_duplicates,
+    _compute_content_hash, _snippets_contain,
+)
+from core.models import (
+    Achievement, ChatMessage, ChatSession, TeenChatSession, Transaction, UserAchievement, UserProfile,
+    UserProgress,
+)
+from core.utils.responses import json_api_errors, parse_json_body
+
+
+class CoachingReplyTests(SimpleTestCase):
+    def test_clean_json(self):
+        reply = '{"advice": "Откладывай 10%", "reasoning": "Так копится резерв", "objective": "Накопления"}'
+
+        self.assertEqual(
+            _parse_coaching_reply(reply),
+            ('Откладывай 10%', 'Так копится резерв', 'Накопления'),
+        )
+
+    def test_json_wrapped_in_prose(self):
+        reply = 'Вот ответ:\n{"advice": "Веди бюджет", "reasoning": "Видно траты", "objective": "Бюджет"}\nУдачи!'
+
+        self.assertEqual(_parse_coaching_reply(reply), ('Веди бюджет', 'Видно траты', 'Бюджет'))
+
+    def test_plain_text_is_the_advice(self):
+        reply = 'Попробуй записывать все покупки за неделю.'
+
+        self.assertEqual(_parse_coaching_reply(reply), (reply, None, None))
+
+    def test_null_objective(self):
+        reply = '{"advice": "Сравни цены", "reasoning": "Экономия", "objective": null}'
+
+        self.assertEqual(_parse_coaching_reply(reply), ('Сравни цены', 'Экономия', None))
+
+    def test_reply_format_follows_prompt_language(self):
+        self.assertEqual(_coaching_reply_format({'preferred_language': 'en'}), _COACHING_REPLY_FORMAT['en'])
+        self.assertEqual(_coaching_reply_format({'preferred_language': 'ky'}), _COACHING_REPLY_FORMAT['ru'])
+        self.assertEqual(_coaching_reply_format({}), _COACHING_REPLY_FORMAT['ru'])
+
+
+@mock.patch('core.signals.calculate_monthly_summaries')
+class MonthlySummarySignalTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username='alice', password='pass')
+        self.bob = User.objects.create_user(username='bob', password='pass')
+
+    def _transaction(self, user, day):
+        return Transaction.objects.create(user=user, date=day, amount=Decimal('10'), type='income')
+
+    def test_one_recalculation_per_user_after_commit(self, calculate):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self._transaction(self.alice, date(2025, 2, 1))
+                self._transaction(self.alice, date(2025, 1, 5))
+                self._transaction(self.alice, date(2025, 1, 9))
+                self._transaction(self.bob, date(2025, 3, 1))
+                calculate.assert_not_called()
+
+        self.assertEqual(
+            sorted((c.args[0].pk, c.kwargs['month_keys']) for c in calculate.call_args_list),
+            [(self.alice.pk, ['2025-01', '2025-02']), (self.bob.pk, ['2025-03'])],
+        )
+
+    def test_rolled_back_block_is_not_recalculated(self, calculate):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self._transaction(self.alice, date(2025, 1, 5))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self._transaction(self.alice, date(2025, 2, 1))
+
+        calculate.assert_called_once_with(self.alice, month_keys=['2025-02'])
+
+    def test_user_deletion_skips_recalculation(self, calculate):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._transaction(self.alice, date(2025, 1, 5))
+            self._transaction(self.alice, date(2025, 2, 1))
+        calculate.reset_mock()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.delete()
+
+        calculate.assert_not_called()
+        self.assertFalse(Transaction.objects.filter(user_id=self.alice.pk).exists())
+
+
+class DuplicateCheckTests(TestCase):
+    PREVIOUS = (
+        "- Откладывай 10% дохода каждый месяц на резервный фонд\n"
+        "- Покупай продукты на рынке\n"
+        "- Сравнивай цены в магазинах"
+    )
+
+    def setUp(self):
+        self.session = ChatSession.objects.create(session_id='dup')
+        ChatMessage.objects.create(
+            session=self.session, role='assistant', content=self.PREVIOUS,
+            content_hash=_compute_content_hash(self.PREVIOUS),
+        )
+
+    def test_cases(self):
+        cases = [
+            ('exact repeat', self.PREVIOUS, _DUPLICATE_NEAR_IDENTICAL),
+            (
+                'snippet contained',
+                "Совет:\n\n- откладывай 10% дохода каждый месяц на резервный фонд, даже понемногу",
+                _DUPLICATE_SIMILAR,
+            ),
+            # Matches only across the end of one previous snippet and the start of
+            # the next; the NUL separator keeps the joined text from gluing them
+            ('joined boundary', "на рынке - сравнивай цены", None),
+            ('no match', "- Поставь цель накопить на ноутбук к лету", None),
+        ]
+        for name, reply, expected in cases:
+            with self.subTest(name):
+                self.assertEqual(_check_for_duplicates(reply, self.session), expected)
+
+    def test_snippets_contain_does_not_cross_separator(self):
+        previous = ["- покупай продукты на рынке", "- сравнивай цены в магазинах"]
+
+        self.assertFalse(_snippets_contain(("на рынке - сравнивай цены",), previous))
+        self.assertTrue(_snippets_contain(("- сравнивай цены в магазинах и на рынке",), previous))
+
+
+def _llm_reply(content):
+    response = mock.Mock(status_code=200)
+    response.content = json.dumps({'choices': [{'message': {'content': content}}]}).encode('utf-8')
+    return response
+
+
+@override_settings(LLM_API_URL='http://llm.test/v1', LLM_API_KEY='key', LLM_MODEL='test-model', GOOGLE_API_KEY='')
+class NearDuplicateReplyTests(TestCase):
+    PREVIOUS = "- Откладывай 10% дохода каждый месяц на резервный фонд\n- Сравнивай цены в магазинах"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u1', password='pass')
+        self.session = ChatSession.objects.create(session_id='near', user=self.user)
+        ChatMessage.objects.create(
+            session=self.session, role='assistant', content=self.PREVIOUS,
+            content_hash=_compute_content_hash(self.PREVIOUS),
+        )
+
+    def _chat(self):
+        return llm.chat_with_context(
+            [{'role': 'user', 'content': 'Как копить?'}],
+            session=self.session, anonymize=False, system_instruction='sys',
+        )
+
+    def test_near_identical_reply_is_marked_without_retry(self):
+        with mock.patch.object(llm._SESSION, 'post', return_value=_llm_reply(self.PREVIOUS)) as post:
+            reply = self._chat()
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(reply, f"{_NEAR_DUPLICATE_MARKER}\n\n{self.PREVIOUS}")
+
+    def test_similar_reply_is_retried(self):
+        similar = "- Откладывай 10% дохода каждый месяц на резервный фонд\n- Поставь цель накопить на ноутбук"
+        with mock.patch.object(
+            llm._SESSION, 'post', side_effect=[_llm_reply(similar), _llm_reply('Новый совет')],
+        ) as post:
+            reply = self._chat()
+
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(reply, 'Новый совет')
+
+    def test_chat_views_store_reply_without_marker(self):
+        advice = {'response': f"{_NEAR_DUPLICATE_MARKER}\n\nСовет", 'query_type': 'general'}
+        self.client.force_login(self.user)
+        for url_name in ('ai_chat_api', 'ai_chat_v2'):
+            with self.subTest(url_name), \
+                    mock.patch('core.ai.advisor.get_financial_advice', return_value=advice), \
+                    mock.patch('core.ai.views.get_financial_advice', return_value=advice):
+                response = self.client.post(
+                    reverse(url_name),
+                    data=json.dumps({'message': 'Как копить?', 'session_id': 'near'}),
+                    content_type='application/json',
+                )
+
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.json()['reply'].startswith(_NEAR_DUPLICATE_MARKER))
+                stored = ChatMessage.objects.filter(session=self.session, role='assistant').latest('id')
+                self.assertEqual(stored.content, 'Совет')
+                self.assertEqual(stored.content_hash, _compute_content_hash('Совет'))
+                self.assertTrue(stored.metadata['near_duplicate'])
+
+
+@json_api_errors
+def _echo_view(request):
+    data = parse_json_body(request)
+    return data['name']
+
+
+class JsonApiErrorsTests(TestCase):
+    def _post(self, body):
+        return RequestFactory().post('/', data=body, content_type='application/json')
+
+    def test_invalid_json(self):
+        response = _echo_view(self._post('{"name": '))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['code'], 'invalid_input')
+
+    def test_bad_value(self):
+        user = User.objects.create_user(username='u1', password='pass')
+        self.client.force_login(user)
+
+        response = self.client.post(
+            reverse('delete_duplicates_api'),
+            data=json.dumps({'transaction_ids': ['abc'], 'type': 'income'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['code'], 'invalid_input')
+
+    def test_missing_key(self):
+        response = _echo_view(self._post('{}'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['code'], 'missing_field')
+
+    def test_internal_error(self):
+        @json_api_errors
+        def broken_view(request):
+            raise ValueError('bug deep in aggregation code')
+
+        with self.assertLogs('core.utils.responses', level='ERROR'):
+            response = broken_view(self._post('{}'))
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(
+            json.loads(response.content),
+            {'ok': False, 'error': 'ValueError', 'code': 'internal_error'},
+        )
+
+
+class GamificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.engine = GamificationEngine()
+        self.engine.initialize_achievements()
+        self.user = User.objects.create_user(username='teen', password='pass')
+        self.profile = UserProfile.objects.create(user=self.user)
+        UserProgress.objects.create(user=self.user)
+
+    def _unlocked_titles(self):
+        return set(UserAchievement.objects.filter(user=self.user).values_list('achievement__title', flat=True))
+
+    def test_registration_and_first_chat_unlock_and_persist(self):
+        chat = TeenChatSession.objects.create(user=self.user, session_id='teen-1')
+
+        checks = self.engine.check_user_achievements(self.user)
+        result = self.engine.unlock_achievements(self.user, checks)
+
+        self.assertIn('Первые шаги', self._unlocked_titles())
+        self.assertIn('Первый разговор', self._unlocked_titles())
+        self.assertEqual(result['unlocked_count'], len(self._unlocked_titles()))
+        stored = UserAchievement.objects.get(user=self.user, achievement__title='Первые шаги')
+        self.assertTrue(stored.is_completed)
+        self.assertEqual(stored.progress, {'registration_date': self.user.date_joined.isoformat()})
+        stored = UserAchievement.objects.get(user=self.user, achievement__title='Первый разговор')
+        self.assertEqual(stored.progress, {'first_chat_date': chat.created_at.isoformat()})
+
+    def test_unlock_awards_points_once(self):
+        first = self.engine.unlock_achievements(self.user, self.engine.check_user_achievements(self.user))
+        self.profile.refresh_from_db()
+        iq_after_first = self.profile.financial_iq_score
+        achievements_after_first = self.profile.total_achievements
+
+        second = self.engine.unlock_achievements(self.user, self.engine.check_user_achievements(self.user))
+        self.profile.refresh_from_db()
+
+        self.assertGreater(first['total_points'], 0)
+        self.assertEqual(second['unlocked_count'], 0)
+        self.assertEqual(second['total_points'], 0)
+        self.assertEqual(self.profile.financial_iq_score, iq_after_first)
+        self.assertEqual(self.profile.total_achievements, achievements_after_first)
+        self.assertEqual(UserAchievement.objects.filter(user=self.user).count(), achievements_after_first)
+
+    def test_dashboard_is_invalidated_after_user_achievement_save(self):
+        before = self.engine.get_user_dashboard_data(self.user)
+        self.assertIsNotNone(cache.get(dashboard_cache_key(self.user.id)))
+
+        UserAchievement.objects.create(
+            user=self.user, achievement=Achievement.objects.get(title='Первые шаги'), is_completed=True,
+        )
+
+        self.assertIsNone(cache.get(dashboard_cache_key(self.user.id)))
+        after = self.engine.get_user_dashboard_data(self.user)
+        self.assertEqual(before['total_points'], 0)
+        self.assertEqual(after['total_points'], 10)
+        self.assertIn('milestone', after['earned_achievements'])
@@ -4,6 +4,7 @@ from typing import List, Dict, Optional, Tuple
 from django.db.models import Sum
 from core.llm import chat_with_context
 from core.models import Income, Expense
+from core.utils.analytics import monthly_totals
 
 def ai_categorize_batch(transactions: List[Dict], type_name: str) -> List[str]:
     """
@@ -66,29 +67,19 @@ def ai_categorize_batch(transactions: List[Dict], type_name: str) -> List[str]:
     
     return ['other'] * len(transactions)
 
-def ai_predict_next_month(user, incomes_qs, expenses_qs) -> Dict:
+def ai_predict_next_month(user, incomes_qs, expenses_qs, monthly=None) -> Dict:
     """
     Uses LLM to predict next month profit based on historical data trajectory.
+    monthly: monthly_totals() of the same querysets, if the caller already has it.
     """
-    # Prepare context: 
-    # Aggregate by month for the last 6 months
-    from django.db.models.functions import TruncMonth
-    
-    monthly_data = {}
-    
-    inc_by_month = incomes_qs.annotate(month=TruncMonth('date')).values('month').annotate(total=Sum('amount')).order_by('month')
-    exp_by_month = expenses_qs.annotate(month=TruncMonth('date')).values('month').annotate(total=Sum('amount')).order_by('month')
-    
-    for row in inc_by_month:
-        m = row['month'].strftime('%Y-%m')
-        if m not in monthly_data: monthly_data[m] = {'income': 0, 'expense': 0}
-        monthly_data[m]['income'] = float(row['total'])
-        
-    for row in exp_by_month:
-        m = row['month'].strftime('%Y-%m')
-        if m not in monthly_data: monthly_data[m] = {'income': 0, 'expense': 0}
-        monthly_data[m]['expense'] = float(row['total'])
-        
+    if monthly is None:
+        monthly = monthly_totals(incomes_qs, expenses_qs)
+
+    monthly_data = {
+        m.strftime('%Y-%m'): {'income': d.get('income', 0), 'expense': d.get('expense', 0)}
+        for m, d in monthly.items()
+    }
+
     history_str = "\n".join([f"{m}: Income {d['income']}, Expense {d['expense']}, Profit {d['income'] - d['expense']}" for m, d in sorted(monthly_data.items())])
     
     prompt = f"""
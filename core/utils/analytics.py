@@ -5,8 +5,13 @@ import re
 import statistics
 from collections import defaultdict
 from datetime import date
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
+import time
+
+from django.core.cache import cache
+from django.db.models import FloatField, Sum
+from django.db.models.functions import Cast, TruncMonth
 from django.utils import timezone
 
 from core.models import Income, Expense, UserProfile
@@ -270,6 +275,12 @@ def _analyze_trends(ordered_keys: List[str], months: Dict[str, Dict[str, Any]])
     }
 
 
+MEMORY_CHUNK_SIZE = 2000
+
+# Amounts come back as floats straight from the DB instead of Decimal per row
+_FLOAT_AMOUNT = Cast('amount', FloatField())
+
+
 def compute_financial_memory(user) -> Dict[str, Any]:
     months: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
         'income_total': 0.0,
@@ -282,32 +293,34 @@ def compute_financial_memory(user) -> Dict[str, Any]:
         'expense_events': [],
     })
 
-    # Use getattr for safety or direct field access if we are sure
-    for inc in Income.objects.filter(user=user).select_related(None):
-        mk = _month_key(inc.date)
+    # Only the needed columns, streamed in chunks, so long histories are never
+    # held as full model instances all at once
+    incomes = Income.objects.filter(user=user).annotate(amt=_FLOAT_AMOUNT).values_list('date', 'amt', 'income_type')
+    for inc_date, amount, cat in incomes.iterator(chunk_size=MEMORY_CHUNK_SIZE):
+        mk = _month_key(inc_date)
         month_data = months[mk]
-        amount = float(inc.amount)
         month_data['income_total'] += amount
         month_data['income_count'] += 1
         month_data['transaction_count'] += 1
-        cat = getattr(inc, 'income_type', 'other') or 'other'
-        month_data['income_by_cat'][cat] += amount
+        month_data['income_by_cat'][cat or 'other'] += amount
 
-    for exp in Expense.objects.filter(user=user).select_related(None):
-        mk = _month_key(exp.date)
+    expenses = Expense.objects.filter(user=user).annotate(amt=_FLOAT_AMOUNT).values_list(
+        'id', 'date', 'amt', 'expense_type', 'description',
+    )
+    for exp_id, exp_date, amount, cat, description in expenses.iterator(chunk_size=MEMORY_CHUNK_SIZE):
+        mk = _month_key(exp_date)
         month_data = months[mk]
-        amount = float(exp.amount)
         month_data['expense_total'] += amount
         month_data['expense_count'] += 1
         month_data['transaction_count'] += 1
-        cat = getattr(exp, 'expense_type', 'other') or 'other'
+        cat = cat or 'other'
         month_data['expense_by_cat'][cat] += amount
         month_data['expense_events'].append({
-            'id': exp.id,
+            'id': exp_id,
             'amount': amount,
             'category': cat,
-            'date': exp.date.isoformat(),
-            'description': exp.description or "",
+            'date': exp_date.isoformat(),
+            'description': description or "",
         })
 
     ordered_keys = sorted(months.keys())
@@ -362,7 +375,7 @@ def compute_financial_memory(user) -> Dict[str, Any]:
     return {
         'generated_at': timezone.now().isoformat(),
         'ordered_keys': ordered_keys,
-        'months': months,
+        'months': dict(months),  # plain dict so the result can be cached (pickled)
         'table_markdown': table_md,
         'summary_text': summary_text,
         'trends': trends,  # Новое: анализ трендов
@@ -380,15 +393,68 @@ def compute_financial_memory(user) -> Dict[str, Any]:
     }
 
 
+def monthly_totals(incomes_qs, expenses_qs) -> Dict[date, Dict[str, float]]:
+    """Income/expense sums per month (keyed by the month's first day), oldest first.
+
+    A month only carries the 'income'/'expense' keys it has rows for. Build it once
+    and hand it to every consumer (forecast, AI forecast, recommendations).
+    """
+    months: Dict[date, Dict[str, float]] = defaultdict(dict)
+    for kind, qs in (('income', incomes_qs), ('expense', expenses_qs)):
+        rows = (
+            qs.annotate(month=TruncMonth('date'))
+            .order_by()
+            .values('month')
+            .annotate(total=Sum('amount'))
+            .values_list('month', 'total')
+        )
+        for month, total in rows:
+            months[month][kind] = float(total or 0)
+    return dict(sorted(months.items()))
+
+
+def _transactions_version_key(user_id: int) -> str:
+    return f"tx:ver:{user_id}"
+
+
+def transactions_version(user_id: int) -> int:
+    """Per-user stamp that changes whenever the user's incomes/expenses change.
+
+    Put it in cache keys of anything derived from transactions. A missing stamp
+    starts from the current time, so it never reuses a value from before eviction.
+    """
+    return cache.get_or_set(_transactions_version_key(user_id), time.time_ns, None)
+
+
+def bump_transactions_version(user_id: int) -> None:
+    try:
+        cache.incr(_transactions_version_key(user_id))
+    except ValueError:
+        pass  # No stamp yet; the next reader creates a fresh one
+
+
+FINANCIAL_MEMORY_CACHE_SECONDS = 3600
+
+
 def update_user_financial_memory(user, force_refresh: bool = False) -> Dict[str, Any]:
-    # Since UserProfile no longer has financial_memory, we just compute it.
-    # If we need persistence, we should add the field back or use a different model.
-    # For now, on-the-fly computation.
-    return compute_financial_memory(user)
+    # Since UserProfile no longer has financial_memory, the memory lives in the cache
+    # (see get_user_financial_memory) rather than on the profile.
+    return get_user_financial_memory(user, force_refresh=force_refresh)
 
 
 def get_user_financial_memory(user, force_refresh: bool = False) -> Dict[str, Any]:
-    return compute_financial_memory(user)
+    """
+    compute_financial_memory(), cached per user. The key carries the transactions
+    version, so any income/expense change makes the next call recompute.
+    """
+    key = f"fin-memory:{user.id}:{transactions_version(user.id)}"
+    if not force_refresh:
+        memory = cache.get(key)
+        if memory is not None:
+            return memory
+    memory = compute_financial_memory(user)
+    cache.set(key, memory, FINANCIAL_MEMORY_CACHE_SECONDS)
+    return memory
 
 
 PROMPT_INSTRUCTION_BLOCK = """
@@ -600,9 +666,13 @@ def parse_actionable_items(reply: str) -> List[Dict[str, Any]]:
     return items
 
 
-def detect_anomalies_automatically(user) -> List[Dict[str, Any]]:
-    """Автоматически обнаруживает аномалии после загрузки данных и возвращает список оповещений с форматом ALERT."""
-    memory = compute_financial_memory(user)
+def detect_anomalies_automatically(user, memory: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Автоматически обнаруживает аномалии после загрузки данных и возвращает список оповещений с форматом ALERT.
+
+    memory: уже посчитанная финансовая память, если она есть у вызывающего (иначе считается заново).
+    """
+    if memory is None:
+        memory = get_user_financial_memory(user)
     alerts = memory.get('alerts', [])
     
     # Дополнительная проверка на резкие изменения
@@ -12,6 +12,7 @@ from django.db.utils import OperationalError
 from core.models import Income, Expense, Document, UploadedFile
 from core.llm import chat_with_context
 from core.utils.ai_utils import ai_categorize_batch
+from core.utils.analytics import bump_transactions_version
 
 
 def map_transaction_category(type_name, cat_str, desc_str):
@@ -90,6 +91,9 @@ def _persist_transactions(income_objs: List[Income], expense_objs: List[Expense]
                     Income.objects.bulk_create(income_objs, batch_size=200)
                 if expense_objs:
                     Expense.objects.bulk_create(expense_objs, batch_size=200)
+            # bulk_create sends no post_save, so drop the cached derivations here
+            for user_id in {obj.user_id for obj in (*income_objs, *expense_objs)}:
+                bump_transactions_version(user_id)
             return
         except OperationalError as exc:
             if "locked" in str(exc).lower() and attempt < DB_LOCK_RETRY_ATTEMPTS - 1:
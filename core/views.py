@@ -12,14 +12,16 @@ import matplotlib.pyplot as plt
 
 from django.db.models import Sum, Q
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse, FileResponse
+from django.http import HttpResponse, JsonResponse, FileResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
+from django.views.decorators.gzip import gzip_page
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 
@@ -38,9 +40,12 @@ from .utils.file_ingest import (
     quick_text_amounts_summary,
     find_duplicates,
 )
+from .utils.responses import FastJsonResponse, iter_json_object, json_api_errors, parse_id_list, parse_json_body
 from .utils.export import export_chat_to_csv, export_chat_to_docx, export_chat_to_pdf
-from .llm import get_ai_advice_from_data, chat_with_context, _compute_content_hash
+from .llm import get_ai_advice_from_data, chat_with_context, _compute_content_hash, split_near_duplicate_marker
 from .utils.analytics import (
+    monthly_totals,
+    transactions_version,
     update_user_financial_memory,
     get_user_financial_memory,
     parse_actionable_items,
@@ -278,6 +283,7 @@ def dashboard(request):
     return render(request, 'dashboard.html', context)
 
 
+@gzip_page
 def records_api(request):
     """Unified records feed with filters and simple pagination."""
     types = request.GET.getlist('type') or ['income', 'expense', 'document', 'event']
@@ -333,9 +339,10 @@ def records_api(request):
     total = len(items)
     start_idx = (page - 1) * page_size
     end_idx = start_idx + page_size
-    return JsonResponse({'total': total, 'page': page, 'page_size': page_size, 'items': items[start_idx:end_idx]})
+    return FastJsonResponse({'total': total, 'page': page, 'page_size': page_size, 'items': items[start_idx:end_idx]})
 
 
+@gzip_page
 @login_required
 def dashboard_data_api(request):
     """API для получения детализированных данных для интерактивных графиков дашборда."""
@@ -559,7 +566,7 @@ def dashboard_data_api(request):
                 monthly_data[month_key]['expense'] += daily_data[date_key]['expense']
                 monthly_data[month_key]['dates'].append(date_key)
     
-    return JsonResponse({
+    return FastJsonResponse({
         'ok': True,
         'daily': {
             'dates': dates,
@@ -584,14 +591,28 @@ def dashboard_data_api(request):
     })
 
 
+AI_INSIGHTS_CACHE_SECONDS = 300
+
+
+@gzip_page
 @login_required
 def ai_insights_api(request):
     start = request.GET.get('start')
     end = request.GET.get('end')
     group_by = request.GET.get('group_by', 'month')  # reserved for future
 
-    incomes = Income.objects.filter(user=request.user)
-    expenses = Expense.objects.filter(user=request.user)
+    # Served from cache until the user's transactions change (the version moves) or the TTL runs out
+    cache_key = f"ai-insights:{request.user.id}:{transactions_version(request.user.id)}:{start}:{end}:{group_by}"
+    payload = cache.get(cache_key)
+    if payload is None:
+        payload = _build_ai_insights(request.user, start, end, group_by)
+        cache.set(cache_key, payload, AI_INSIGHTS_CACHE_SECONDS)
+    return FastJsonResponse(payload)
+
+
+def _build_ai_insights(user, start, end, group_by) -> Dict:
+    incomes = Income.objects.filter(user=user)
+    expenses = Expense.objects.filter(user=user)
     if start:
         incomes = incomes.filter(date__gte=start)
         expenses = expenses.filter(date__gte=start)
@@ -599,22 +620,27 @@ def ai_insights_api(request):
         incomes = incomes.filter(date__lte=end)
         expenses = expenses.filter(date__lte=end)
 
-    # KPIs
+    # KPIs; the per-category expense rows (one query) also give the expense total
     from django.db.models import Sum
+    exp_by_cat = list(expenses.values('expense_type').annotate(total=Sum('amount')).order_by('-total'))
     income_total = float(incomes.aggregate(total=Sum('amount'))['total'] or 0.0)
-    expense_total = float(expenses.aggregate(total=Sum('amount'))['total'] or 0.0)
+    expense_total = float(sum(r['total'] or 0 for r in exp_by_cat))
     profit = income_total - expense_total
 
+    # Monthly roll-up, shared by the forecasts and the recommendations
+    monthly = monthly_totals(incomes, expenses)
+
     # Simple forecast (next month profit)
-    next_profit_data = forecast_next_month_profit(incomes, expenses, user=request.user)
+    next_profit_data = forecast_next_month_profit(incomes, expenses, user=user, monthly=monthly)
 
     # Recommendations
-    recommendations = build_recommendations(incomes, expenses)
+    recommendations = build_recommendations(
+        incomes, expenses, expense_by_category=exp_by_cat, monthly=monthly,
+    )
 
     # Alerts: expense categories above rolling average
     alerts = []
-    exp_by_cat = expenses.values('expense_type').annotate(total=Sum('amount')).order_by('-total')
-    avg_expense = (expense_total / max(1, exp_by_cat.count())) if exp_by_cat else 0
+    avg_expense = (expense_total / len(exp_by_cat)) if exp_by_cat else 0
     for row in exp_by_cat:
         cat_name = row['expense_type']
         cat_total = float(row['total'] or 0)
@@ -632,7 +658,7 @@ def ai_insights_api(request):
         {'category': r['expense_type'], 'total': float(r['total'] or 0)} for r in exp_by_cat
     ]
 
-    return JsonResponse({
+    return {
         'kpis': {
             'income_total': round(income_total, 2),
             'expense_total': round(expense_total, 2),
@@ -645,7 +671,7 @@ def ai_insights_api(request):
             'expense_by_category': cat_breakdown,
         },
         'group_by': group_by,
-    })
+    }
 
 
 def _serialize_transactions_csv(incomes_qs, expenses_qs) -> str:
@@ -803,7 +829,7 @@ def upload_api(request):
         anomaly_alerts = []
         try:
             memory = update_user_financial_memory(request.user, force_refresh=True)
-            anomaly_alerts = detect_anomalies_automatically(request.user)
+            anomaly_alerts = detect_anomalies_automatically(request.user, memory=memory)
             
             # Сохраняем в сессию, если есть
             if attached_session_id:
@@ -889,7 +915,7 @@ def ai_chat_api(request):
     # Поддержка JSON запросов
     try:
         if request.content_type == 'application/json':
-            data = json.loads(request.body)
+            data = parse_json_body(request)
             msg = data.get('message', '').strip()
             session_id = data.get('session_id')
             start = data.get('start')
@@ -928,7 +954,7 @@ def ai_chat_api(request):
     # Переопределение через запрос
     try:
         if request.content_type == 'application/json':
-            data_override = json.loads(request.body)
+            data_override = parse_json_body(request)
         else:
             data_override = request.POST
         if data_override is not None:
@@ -1070,15 +1096,17 @@ def ai_chat_api(request):
     # Извлекаем actionable советы из ответа с поддержкой новых тегов
     actionable_items = parse_actionable_items(reply)
     
-    # Сохраняем ответ ассистента
+    # Сохраняем ответ ассистента (пометка о повторе только для показа, не в историю)
+    stored_reply, near_duplicate = split_near_duplicate_marker(reply)
     assistant_msg = ChatMessage.objects.create(
         session=session,
         role='assistant',
-        content=reply,
-        content_hash=_compute_content_hash(reply),
+        content=stored_reply,
+        content_hash=_compute_content_hash(stored_reply),
         metadata={
             'actionable_items': actionable_items,
             'items_count': len(actionable_items),
+            'near_duplicate': near_duplicate,
         }
     )
     
@@ -1196,7 +1224,7 @@ def user_settings_api(request):
 
     if request.method == 'POST':
         try:
-            data = json.loads(request.body.decode('utf-8')) if request.body else {}
+            data = parse_json_body(request)
         except Exception:
             data = {}
 
@@ -1227,55 +1255,73 @@ def user_settings_api(request):
 
 
 @login_required
+@json_api_errors
 def delete_all_data_api(request):
     """Удаляет ВСЕ данные пользователя по запросу (one-click)."""
     if request.method != 'POST':
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
-    try:
-        Income.objects.filter(user=request.user).delete()
-        Expense.objects.filter(user=request.user).delete()
-        Event.objects.filter(user=request.user).delete()
-        Document.objects.filter(user=request.user).delete()
-        ChatSession.objects.filter(user=request.user).delete()
-        # Uploaded files: delete files on disk
-        for f in UploadedFile.objects.filter(user=request.user):
-            try:
-                f.file.delete(save=False)
-            except Exception:
-                pass
-            f.delete()
-        return JsonResponse({'ok': True, 'message': 'Все данные удалены'})
-    except Exception as ex:
-        return JsonResponse({'ok': False, 'error': str(ex)}, status=500)
+    Income.objects.filter(user=request.user).delete()
+    Expense.objects.filter(user=request.user).delete()
+    Event.objects.filter(user=request.user).delete()
+    Document.objects.filter(user=request.user).delete()
+    ChatSession.objects.filter(user=request.user).delete()
+    # Uploaded files: delete files on disk
+    for f in UploadedFile.objects.filter(user=request.user):
+        try:
+            f.file.delete(save=False)
+        except Exception:
+            pass
+        f.delete()
+    return JsonResponse({'ok': True, 'message': 'Все данные удалены'})
+
+
+EXPORT_CHUNK_SIZE = 500
 
 
 @login_required
 def export_all_data_api(request):
     """Возвращает все пользовательские данные в JSON для локального шифрования на клиенте."""
-    # Build datasets
-    incomes = list(Income.objects.filter(user=request.user).values('amount', 'date', 'category', 'description', 'tags'))
-    expenses = list(Expense.objects.filter(user=request.user).values('amount', 'date', 'category', 'description', 'tags'))
-    events = list(Event.objects.filter(user=request.user).values('date', 'title', 'description'))
-    documents = list(Document.objects.filter(user=request.user).values('id', 'doc_type', 'params', 'generated_text', 'created_at'))
-    # Chat history
-    sessions_payload = []
-    for s in ChatSession.objects.filter(user=request.user).order_by('created_at'):
-        msgs = list(ChatMessage.objects.filter(session=s).order_by('created_at').values('role', 'content', 'created_at'))
-        sessions_payload.append({
+    from django.db.models import F
+
+    user = request.user
+    # Each dataset is read in chunks and encoded row by row while the response streams
+    sections = [
+        ('incomes', Income.objects.filter(user=user).values(
+            'amount', 'date', 'description', category=F('income_type'),
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('expenses', Expense.objects.filter(user=user).values(
+            'amount', 'date', 'description', category=F('expense_type'),
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('events', Event.objects.filter(user=user).values(
+            'date', 'title', 'description',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('documents', Document.objects.filter(user=user).values(
+            'id', 'doc_type', 'params', 'generated_text', 'created_at',
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        ('chat_sessions', _export_chat_sessions(user)),
+    ]
+    return StreamingHttpResponse(iter_json_object(sections), content_type='application/json')
+
+
+def _export_chat_sessions(user):
+    from django.db.models import Prefetch
+
+    sessions = ChatSession.objects.filter(user=user).order_by('created_at').prefetch_related(
+        Prefetch('messages', queryset=ChatMessage.objects.order_by('created_at').only(
+            'session_id', 'role', 'content', 'created_at',
+        )),
+    )
+    for s in sessions.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
             'session_id': s.session_id,
             'title': s.title,
             'created_at': s.created_at,
             'updated_at': s.updated_at,
-            'messages': msgs,
-        })
-
-    return JsonResponse({
-        'incomes': incomes,
-        'expenses': expenses,
-        'events': events,
-        'documents': documents,
-        'chat_sessions': sessions_payload,
-    })
+            'messages': [
+                {'role': m.role, 'content': m.content, 'created_at': m.created_at}
+                for m in s.messages.all()
+            ],
+        }
 
 
 class IncomeListView(ListView):
@@ -1566,8 +1612,9 @@ class DocumentDeleteView(DeleteView):
 def ai_recommendations(request):
     incomes = Income.objects.filter(user=request.user)
     expenses = Expense.objects.filter(user=request.user)
-    forecast = forecast_next_month_profit(incomes, expenses)
-    recs = build_recommendations(incomes, expenses)
+    monthly = monthly_totals(incomes, expenses)
+    forecast = forecast_next_month_profit(incomes, expenses, monthly=monthly)
+    recs = build_recommendations(incomes, expenses, monthly=monthly)
     return render(request, 'ai_recommendations.html', {
         'forecast': forecast,
         'recommendations': recs,
@@ -1685,7 +1732,7 @@ def rename_chat_session(request, session_id):
     if request.method != 'POST':
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
     try:
-        payload = json.loads(request.body.decode('utf-8')) if request.body else {}
+        payload = parse_json_body(request)
     except Exception:
         payload = {}
     new_title = (payload.get('title') or '').strip()
@@ -1893,41 +1940,36 @@ def delete_transactions_by_file(request, file_id):
 
 
 @login_required
+@json_api_errors
 def delete_transactions_by_files(request):
     """Массовое удаление транзакций из нескольких файлов"""
     if request.method != 'POST':
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
     
-    import json
-    try:
-        data = json.loads(request.body)
-        file_ids = data.get('file_ids', [])
-        
-        if not file_ids:
-            return JsonResponse({'ok': False, 'error': 'Не указаны ID файлов'}, status=400)
-        
-        files = UploadedFile.objects.filter(id__in=file_ids, user=request.user)
-        total_income = 0
-        total_expense = 0
-        
-        for file_obj in files:
-            income_count = Income.objects.filter(user=request.user, source_file=file_obj).count()
-            expense_count = Expense.objects.filter(user=request.user, source_file=file_obj).count()
-            total_income += income_count
-            total_expense += expense_count
-            
-            Income.objects.filter(user=request.user, source_file=file_obj).delete()
-            Expense.objects.filter(user=request.user, source_file=file_obj).delete()
+    data = parse_json_body(request)
+    file_ids = parse_id_list(data.get('file_ids'))
+    
+    if not file_ids:
+        return JsonResponse({'ok': False, 'error': 'Не указаны ID файлов'}, status=400)
+    
+    files = UploadedFile.objects.filter(id__in=file_ids, user=request.user)
+    total_income = 0
+    total_expense = 0
+    
+    for file_obj in files:
+        income_count = Income.objects.filter(user=request.user, source_file=file_obj).count()
+        expense_count = Expense.objects.filter(user=request.user, source_file=file_obj).count()
+        total_income += income_count
+        total_expense += expense_count
         
-        return JsonResponse({
-            'ok': True,
-            'message': f'Удалено из {len(files)} файлов: доходов {total_income}, расходов {total_expense}',
-            'deleted': {'incomes': total_income, 'expenses': total_expense, 'files': len(files)}
-        })
-    except json.JSONDecodeError:
-        return JsonResponse({'ok': False, 'error': 'Неверный JSON'}, status=400)
-    except Exception as e:
-        return JsonResponse({'ok': False, 'error': str(e)}, status=500)
+        Income.objects.filter(user=request.user, source_file=file_obj).delete()
+        Expense.objects.filter(user=request.user, source_file=file_obj).delete()
+    
+    return JsonResponse({
+        'ok': True,
+        'message': f'Удалено из {len(files)} файлов: доходов {total_income}, расходов {total_expense}',
+        'deleted': {'incomes': total_income, 'expenses': total_expense, 'files': len(files)}
+    })
 
 
 @login_required
@@ -1993,37 +2035,32 @@ def find_duplicates_api(request):
 
 
 @login_required
+@json_api_errors
 def delete_duplicates_api(request):
     """API для удаления выбранных дубликатов"""
     if request.method != 'POST':
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
     
-    import json
-    try:
-        data = json.loads(request.body)
-        transaction_ids = data.get('transaction_ids', [])
-        transaction_type = data.get('type')  # 'income' or 'expense'
-        
-        if not transaction_ids or not transaction_type:
-            return JsonResponse({'ok': False, 'error': 'Не указаны ID транзакций или тип'}, status=400)
-        
-        deleted_count = 0
-        if transaction_type == 'income':
-            deleted_count = Income.objects.filter(id__in=transaction_ids, user=request.user).delete()[0]
-        elif transaction_type == 'expense':
-            deleted_count = Expense.objects.filter(id__in=transaction_ids, user=request.user).delete()[0]
-        else:
-            return JsonResponse({'ok': False, 'error': 'Неверный тип транзакции'}, status=400)
-        
-        return JsonResponse({
-            'ok': True,
-            'message': f'Удалено {deleted_count} транзакций',
-            'deleted_count': deleted_count
-        })
-    except json.JSONDecodeError:
-        return JsonResponse({'ok': False, 'error': 'Неверный JSON'}, status=400)
-    except Exception as e:
-        return JsonResponse({'ok': False, 'error': str(e)}, status=500)
+    data = parse_json_body(request)
+    transaction_ids = parse_id_list(data.get('transaction_ids'))
+    transaction_type = data.get('type')  # 'income' or 'expense'
+    
+    if not transaction_ids or not transaction_type:
+        return JsonResponse({'ok': False, 'error': 'Не указаны ID транзакций или тип'}, status=400)
+    
+    deleted_count = 0
+    if transaction_type == 'income':
+        deleted_count = Income.objects.filter(id__in=transaction_ids, user=request.user).delete()[0]
+    elif transaction_type == 'expense':
+        deleted_count = Expense.objects.filter(id__in=transaction_ids, user=request.user).delete()[0]
+    else:
+        return JsonResponse({'ok': False, 'error': 'Неверный тип транзакции'}, status=400)
+    
+    return JsonResponse({
+        'ok': True,
+        'message': f'Удалено {deleted_count} транзакций',
+        'deleted_count': deleted_count
+    })
 
 
 # ============================================================================
@@ -2046,7 +2083,7 @@ def compare_chats_api(request):
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
 
     try:
-        payload = json.loads(request.body.decode('utf-8'))
+        payload = parse_json_body(request)
     except Exception:
         return JsonResponse({'ok': False, 'error': 'Invalid JSON'}, status=400)
 
@@ -2139,7 +2176,7 @@ def mark_advice_completed(request, session_id):
         return JsonResponse({'ok': False, 'error': 'POST only'}, status=405)
     
     try:
-        payload = json.loads(request.body.decode('utf-8')) if request.body else {}
+        payload = parse_json_body(request)
         advice_index = payload.get('advice_index')  # Индекс в списке all_advices
         advice_id = payload.get('advice_id')  # Альтернативно: ID совета
         
@@ -2196,46 +2233,44 @@ def mark_advice_completed(request, session_id):
 
 
 @login_required
+@json_api_errors
 def get_action_stats(request, session_id=None):
     """Получение статистики по советам и действиям"""
-    try:
-        # session_id может быть передан через URL или GET параметр
-        if not session_id:
-            session_id = request.GET.get('session_id')
-        
-        if session_id:
-            sessions = ChatSession.objects.filter(session_id=session_id, user=request.user)
-        else:
-            sessions = ChatSession.objects.filter(user=request.user)
-        
-        total_advices = 0
-        completed_advices = 0
-        useful_messages = 0
-        total_messages = 0
-        
-        for session in sessions:
-            action_log = session.action_log or {}
-            total_advices += action_log.get('advices_given', 0)
-            completed_advices += action_log.get('advices_completed', 0)
-            total_messages += action_log.get('total_messages', 0)
-        
-        useful_messages = ChatMessage.objects.filter(
-            session__user=request.user,
-            is_useful=True
-        ).count()
-        
-        return JsonResponse({
-            'ok': True,
-            'stats': {
-                'total_advices': total_advices,
-                'completed_advices': completed_advices,
-                'completion_rate': round(completed_advices / total_advices * 100, 2) if total_advices > 0 else 0,
-                'useful_messages': useful_messages,
-                'total_messages': total_messages,
-            }
-        })
-    except Exception as e:
-        return JsonResponse({'ok': False, 'error': str(e)}, status=500)
+    # session_id может быть передан через URL или GET параметр
+    if not session_id:
+        session_id = request.GET.get('session_id')
+    
+    if session_id:
+        sessions = ChatSession.objects.filter(session_id=session_id, user=request.user)
+    else:
+        sessions = ChatSession.objects.filter(user=request.user)
+    
+    total_advices = 0
+    completed_advices = 0
+    useful_messages = 0
+    total_messages = 0
+    
+    for session in sessions:
+        action_log = session.action_log or {}
+        total_advices += action_log.get('advices_given', 0)
+        completed_advices += action_log.get('advices_completed', 0)
+        total_messages += action_log.get('total_messages', 0)
+    
+    useful_messages = ChatMessage.objects.filter(
+        session__user=request.user,
+        is_useful=True
+    ).count()
+    
+    return JsonResponse({
+        'ok': True,
+        'stats': {
+            'total_advices': total_advices,
+            'completed_advices': completed_advices,
+            'completion_rate': round(completed_advices / total_advices * 100, 2) if total_advices > 0 else 0,
+            'useful_messages': useful_messages,
+            'total_messages': total_messages,
+        }
+    })
 
 
 @login_required
@@ -2308,11 +2343,16 @@ def export_chat_markdown(request, session_id):
     response['Content-Disposition'] = f'attachment; filename="chat_{session.session_id[:8]}.md"'
     return response
 
+
+RECLASSIFY_MAX_WORKERS = 4
+
+
 @login_required
 def ai_reclassify_others(request):
     """
     Finds all 'other' transactions for the user and tries to reclassify them using AI.
     """
+    from concurrent.futures import ThreadPoolExecutor
     from core.utils.ai_utils import ai_categorize_batch
     
     other_incomes = list(Income.objects.filter(user=request.user, income_type='other'))
@@ -2321,27 +2361,31 @@ def ai_reclassify_others(request):
     if not other_incomes and not other_expenses:
         return JsonResponse({'ok': True, 'message': 'Нет транзакций в категории "Другое"'})
     
+    # Chunks keep each prompt small; all chunks are classified concurrently
+    # instead of one LLM round-trip after another
+    chunk_size = 20
+    batches = [
+        (items[i:i + chunk_size], item_type, field)
+        for items, item_type, field in (
+            (other_incomes, 'income', 'income_type'),
+            (other_expenses, 'expense', 'expense_type'),
+        )
+        for i in range(0, len(items), chunk_size)
+    ]
+    with ThreadPoolExecutor(max_workers=min(RECLASSIFY_MAX_WORKERS, len(batches))) as pool:
+        futures = [
+            pool.submit(ai_categorize_batch, [{'description': it.description or ''} for it in chunk], item_type)
+            for chunk, item_type, _ in batches
+        ]
+        results = [future.result() for future in futures]
+
     reclassified_count = 0
-    
-    # Process in chunks to avoid huge prompts
-    def process_batch(items, item_type):
-        nonlocal reclassified_count
-        chunk_size = 20
-        for i in range(0, len(items), chunk_size):
-            chunk = items[i:i + chunk_size]
-            transactions_data = [{'description': it.description or ''} for it in chunk]
-            ai_cats = ai_categorize_batch(transactions_data, item_type)
-            for it, cat in zip(chunk, ai_cats):
-                if cat != 'other':
-                    if item_type == 'income': 
-                        it.income_type = cat
-                    else:
-                        it.expense_type = cat
-                    it.save()
-                    reclassified_count += 1
-
-    process_batch(other_incomes, 'income')
-    process_batch(other_expenses, 'expense')
+    for (chunk, _, field), ai_cats in zip(batches, results):
+        for it, cat in zip(chunk, ai_cats):
+            if cat != 'other':
+                setattr(it, field, cat)
+                it.save()  # per-row save keeps the Transaction mirror in sync
+                reclassified_count += 1
                 
     return JsonResponse({'ok': True, 'message': f'Обработано {len(other_incomes) + len(other_expenses)} транзакций. Изменено категорий: {reclassified_count}'})
 
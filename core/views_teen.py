@@ -24,8 +24,9 @@ from .models import (
     Achievement, UserAchievement, FinancialInsight, ScamAlert, UserProgress
 )
 from .ai_services.teen_coach import teen_coach
-from .ai_services.gamification import gamification_engine
+from .ai_services.gamification import gamification_engine, get_active_achievements
 from .ai_services.llm_manager import llm_manager
+from .utils.responses import parse_json_body
 
 logger = logging.getLogger(__name__)
 
@@ -312,7 +313,7 @@ def chat_with_ai(request):
     if request.method == 'POST':
         try:
             user = request.user
-            data = json.loads(request.body)
+            data = parse_json_body(request)
             
             message = data.get('message', '').strip()
             session_id = data.get('session_id')
@@ -593,7 +594,7 @@ def report_scam(request):
     if request.method == 'POST':
         try:
             user = request.user
-            data = json.loads(request.body)
+            data = parse_json_body(request)
             
             reported_text = data.get('text', '').strip()
             reported_url = data.get('url', '').strip()
@@ -735,20 +736,21 @@ def achievements_view(request):
         ).select_related('achievement').order_by('-earned_at')
         
         # Get all available achievements
-        all_achievements = Achievement.objects.filter(is_active=True)
+        all_achievements = get_active_achievements()
         
         # Categorize achievements
-        earned_achievement_ids = set(user_achievements.values_list('achievement_id', flat=True))
+        earned_achievement_ids = set(user_achievements.order_by().values_list('achievement_id', flat=True))
         
         earned_achievements = []
         available_achievements = []
+        metrics = gamification_engine._collect_user_metrics(user)
         
         for achievement in all_achievements:
             if achievement.id in earned_achievement_ids:
                 earned_achievements.append(achievement)
             else:
                 # Calculate progress
-                check_result = gamification_engine._check_single_achievement(user, achievement)
+                check_result = gamification_engine._check_single_achievement_with_metrics(achievement, metrics)
                 progress_percent = gamification_engine._calculate_achievement_progress(
                     check_result.progress, achievement.criteria
                 )
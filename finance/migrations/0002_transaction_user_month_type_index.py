@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='finance_tra_user_id_d2b585_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'month_key', 'type'], name='finance_tra_user_id_fb2089_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-15 22:39
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_transaction_user_month_type_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, help_text='Amount (positive). Type determines if income or expense.', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))]),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='source',
+            field=models.CharField(default='manual', help_text='Source of transaction', max_length=50),
+        ),
+    ]
@@ -48,7 +48,8 @@ class Transaction(models.Model):
         ordering = ["-date", "-created_at"]
         indexes = [
             models.Index(fields=["user", "date"]),
-            models.Index(fields=["user", "month_key"]),
+            # Covers (user, month_key) lookups too; recalculate() and top categories also filter by type.
+            models.Index(fields=["user", "month_key", "type"]),
             models.Index(fields=["user", "type"]),
         ]
 
@@ -37,20 +37,21 @@ class ForecastService:
                 used_months=len(history),
             )
 
-        profits = np.array([float(s.profit) for s in history], dtype=float)
-        x = np.arange(len(profits), dtype=float)
+        n = len(history)
+        profits = np.fromiter((s.profit for s in history), dtype=np.float64, count=n)
+        x = np.arange(n, dtype=np.float64)
 
-        coef = np.polyfit(x, profits, 1)
-        p = np.poly1d(coef)
-        y_hat = p(x)
-        residuals = profits - y_hat
+        # Closed-form least squares for the degree-1 trend (np.polyfit goes through lstsq/SVD).
+        x_c = x - x.mean()
+        y_mean = profits.mean()
+        slope = np.dot(x_c, profits - y_mean) / np.dot(x_c, x_c)
+        intercept = y_mean - slope * x.mean()
+        residuals = profits - (slope * x + intercept)
 
-        forecast_value = float(p(len(profits)))
+        forecast_value = float(slope * n + intercept)
 
-        if len(residuals) >= 2:
-            std = float(np.std(residuals, ddof=1))
-        else:
-            std = float(np.std(residuals))
+        # n >= 3 here, so the sample standard deviation is always defined.
+        std = float(np.std(residuals, ddof=1))
 
         lower = forecast_value - 1.28 * std
         upper = forecast_value + 1.28 * std
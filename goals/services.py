@@ -61,9 +61,14 @@ class GoalService:
         current = goal.current_saved
         progress = goal.progress_percent
 
-        summaries = MonthlySummary.objects.filter(user=goal.user).order_by('-month_key')[:3]
+        # One query for the last three profits; the old count() + iteration hit the DB twice.
+        profits = list(
+            MonthlySummary.objects.filter(user=goal.user)
+            .order_by('-month_key')
+            .values_list('profit', flat=True)[:3]
+        )
 
-        if summaries.count() < 1:
+        if not profits:
             return GoalProgress(
                 current_saved=current,
                 progress_percent=progress,
@@ -71,8 +76,7 @@ class GoalService:
                 probability_of_success=0,
             )
 
-        total = sum(s.profit for s in summaries)
-        avg_profit = total / len(summaries)
+        avg_profit = sum(profits) / len(profits)
 
         remaining = goal.target_amount - current
         days_left = (goal.target_date - date.today()).days
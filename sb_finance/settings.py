@@ -103,7 +103,17 @@ REST_FRAMEWORK = {
 DEEPSEEK_API_URL = os.getenv('DEEPSEEK_API_URL', '')
 DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY', '')
 DEEPSEEK_MODEL = os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')
-DEEPSEEK_TIMEOUT_SECONDS = int(os.getenv('DEEPSEEK_TIMEOUT_SECONDS', '30'))
+# Connect/read timeouts per attempt; timed-out requests are retried DEEPSEEK_MAX_RETRIES times.
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv('DEEPSEEK_CONNECT_TIMEOUT', '5'))
+DEEPSEEK_READ_TIMEOUT = float(os.getenv('DEEPSEEK_READ_TIMEOUT', '15'))
+DEEPSEEK_MAX_RETRIES = int(os.getenv('DEEPSEEK_MAX_RETRIES', '2'))
+# After this many consecutive outages, skip DeepSeek for DEEPSEEK_BREAKER_RESET_SECONDS.
+DEEPSEEK_BREAKER_FAIL_MAX = int(os.getenv('DEEPSEEK_BREAKER_FAIL_MAX', '5'))
+DEEPSEEK_BREAKER_RESET_SECONDS = float(os.getenv('DEEPSEEK_BREAKER_RESET_SECONDS', '30'))
+# Write AIRecommendationLog rows from a background worker after commit (False = inline).
+AI_LOG_IN_BACKGROUND = os.getenv('AI_LOG_IN_BACKGROUND', 'True') == 'True'
+# Identical prompts are answered from django.core.cache for this long (0 disables).
+DEEPSEEK_CACHE_SECONDS = int(os.getenv('DEEPSEEK_CACHE_SECONDS', str(60 * 60 * 24)))
 
 # === LLM / AI SETTINGS ===
 # Вставьте ваш ключ и эндпоинт в .env или прямо здесь (для демо):
@@ -222,6 +232,8 @@ LLM_API_KEY = os.getenv('LLM_API_KEY')
 LLM_MODEL = os.getenv('LLM_MODEL', 'openai/gpt-4o-mini')
 LLM_API_URL = os.getenv('LLM_API_URL', 'https://openrouter.ai/api/v1/chat/completions')
 LLM_HTTP_REFERER = os.getenv('LLM_HTTP_REFERER', 'http://localhost:8000')
+# Near-identical coach questions from similar users are answered from the cache (0 disables)
+TEEN_COACH_CACHE_SECONDS = int(os.getenv('TEEN_COACH_CACHE_SECONDS', str(60 * 60 * 6)))
 
 # Teen-specific features
 TEEN_EDUCATION_ENABLED = True